@@ -0,0 +1,312 @@
+import argparse
+import json
+import math
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
+from tile_generator import mercator
+from transport_data import latest_export, load_snapshot
+
+INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'tiles', 'clusters.bin')
+MAGIC = b'QPCL'
+RADIUS_PX = 60
+EXTENT_PX = 512
+
+
+def inverse_mercator(x, y):
+    """Web Mercator [0, 1) -> (lon, lat)"""
+    lon = x * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return lon, lat
+
+
+class _Level:
+    """Punkte bzw. Cluster einer Zoomstufe in Spalten"""
+
+    def __init__(self, num_types):
+        self.num_types = num_types
+        self.x = []
+        self.y = []
+        self.count = []
+        self.type_counts = []  # flach, num_types Einträge je Cluster
+        self.feature = []  # nur Blattebene: Index im Export
+        self.parent = []
+        self.children = []
+
+    def __len__(self):
+        return len(self.x)
+
+
+def _cluster_level(points, zoom, radius_px, extent_px):
+    """
+    Fasst die Punkte der nächstfeineren Ebene zusammen (wie supercluster): jeder noch freie Punkt
+    sammelt alle freien Nachbarn im Radius ein, der Cluster liegt im gewichteten Schwerpunkt.
+    Nachbarn werden über ein Gitter mit Zellgröße = Radius gesucht.
+    """
+    radius = radius_px / (extent_px * 2 ** zoom)
+    grid = {}
+    for i in range(len(points)):
+        grid.setdefault((int(points.x[i] / radius), int(points.y[i] / radius)), []).append(i)
+
+    level = _Level(points.num_types)
+    assigned = [False] * len(points)
+    num_types = points.num_types
+    for i in range(len(points)):
+        if assigned[i]:
+            continue
+        assigned[i] = True
+        px, py = points.x[i], points.y[i]
+        members = [i]
+        cx, cy = int(px / radius), int(py / radius)
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                for j in grid.get((gx, gy), ()):
+                    if not assigned[j] and (points.x[j] - px) ** 2 + (points.y[j] - py) ** 2 <= radius * radius:
+                        assigned[j] = True
+                        members.append(j)
+
+        index = len(level)
+        total = sum(points.count[m] for m in members)
+        level.x.append(sum(points.x[m] * points.count[m] for m in members) / total)
+        level.y.append(sum(points.y[m] * points.count[m] for m in members) / total)
+        level.count.append(total)
+        type_counts = [0] * num_types
+        for m in members:
+            base = m * num_types
+            for t in range(num_types):
+                type_counts[t] += points.type_counts[base + t]
+            points.parent[m] = index
+        level.type_counts.extend(type_counts)
+        level.children.append(members)
+    return level
+
+
+def _sort_by_x(levels):
+    """Sortiert jede Ebene nach x, damit Bounding-Box-Abfragen per Bisektion arbeiten, und passt Verweise an"""
+    for z, level in enumerate(levels):
+        order = sorted(range(len(level)), key=level.x.__getitem__)
+        new_index = [0] * len(level)
+        for new, old in enumerate(order):
+            new_index[old] = new
+        num_types = level.num_types
+        level.x = [level.x[i] for i in order]
+        level.y = [level.y[i] for i in order]
+        level.count = [level.count[i] for i in order]
+        level.type_counts = [level.type_counts[i * num_types + t] for i in order for t in range(num_types)]
+        if level.feature:
+            level.feature = [level.feature[i] for i in order]
+        if level.parent:
+            level.parent = [level.parent[i] for i in order]
+        if level.children:
+            level.children = [level.children[i] for i in order]
+        if z > 0:
+            coarser = levels[z - 1]
+            coarser.children = [[new_index[c] for c in children] for children in coarser.children]
+        if z + 1 < len(levels):
+            finer = levels[z + 1]
+            finer.parent = [new_index[p] for p in finer.parent]
+
+
+def build_clusters(export_path=None, min_zoom=0, max_zoom=16, radius_px=RADIUS_PX, extent_px=EXTENT_PX):
+    """
+    Baut die Cluster-Hierarchie: Ebene max_zoom + 1 enthält die einzelnen Features, jede gröbere
+    Ebene die Cluster der darunterliegenden. Liefert (Kopfdaten, Ebenen von min_zoom bis max_zoom + 1).
+    """
+    snapshot = load_snapshot(export_path)
+    types = list(snapshot.types)
+    num_types = len(types)
+
+    leaves = _Level(num_types)
+    for i in range(len(snapshot)):
+        lon, lat = snapshot.lon[i], snapshot.lat[i]
+        if math.isnan(lon) or math.isnan(lat):
+            continue
+        x, y = mercator(lon, lat)
+        leaves.x.append(x)
+        leaves.y.append(y)
+        leaves.count.append(1)
+        type_counts = [0] * num_types
+        type_counts[snapshot.type_code[i]] = 1
+        leaves.type_counts.extend(type_counts)
+        leaves.feature.append(i)
+    leaves.parent = [0] * len(leaves)
+
+    levels = [leaves]
+    for zoom in range(max_zoom, min_zoom - 1, -1):
+        level = _cluster_level(levels[0], zoom, radius_px, extent_px)
+        level.parent = [0] * len(level)
+        levels.insert(0, level)
+    levels[0].parent = []
+
+    _sort_by_x(levels)
+    header = {
+        'source': os.path.basename(snapshot.path),
+        'types': types,
+        'min_zoom': min_zoom,
+        'max_zoom': max_zoom,
+        'radius_px': radius_px,
+        'extent_px': extent_px,
+    }
+    return header, levels
+
+
+def save_index(path, header, levels):
+    """
+    Binärformat: MAGIC, Länge und JSON-Kopf, danach die Spalten jeder Ebene als rohe Arrays
+    (x/y float32, Anzahl/Verweise uint32). Der Kopf enthält Offset und Typ jeder Spalte.
+    """
+    columns = []
+    for z, level in enumerate(levels):
+        zoom = header['min_zoom'] + z
+        offsets = [0]
+        flat_children = []
+        for children in level.children:
+            flat_children.extend(children)
+            offsets.append(len(flat_children))
+        level_columns = {
+            'x': array('f', level.x), 'y': array('f', level.y),
+            'count': array('I', level.count), 'type_counts': array('I', level.type_counts),
+        }
+        if level.feature:
+            level_columns['feature'] = array('I', level.feature)
+        if level.parent:
+            level_columns['parent'] = array('I', level.parent)
+        if level.children:
+            level_columns['child_offsets'] = array('I', offsets)
+            level_columns['children'] = array('I', flat_children)
+        columns.append((zoom, level_columns))
+
+    layout = []
+    blobs = []
+    offset = 0
+    for zoom, level_columns in columns:
+        for name, values in level_columns.items():
+            blob = values.tobytes()
+            layout.append([zoom, name, values.typecode, offset, len(values)])
+            blobs.append(blob)
+            offset += len(blob)
+    head = json.dumps(dict(header, columns=layout), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<I', len(head)) + head)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+
+
+class ClusterIndex:
+    """Liest einen gespeicherten Cluster-Index und beantwortet Bounding-Box-Abfragen je Zoomstufe"""
+
+    def __init__(self, path=INDEX_FILE):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path} ist kein Cluster-Index")
+        head_length = struct.unpack('<I', data[4:8])[0]
+        self.header = json.loads(data[8:8 + head_length].decode('utf-8'))
+        body = memoryview(data)[8 + head_length:]
+        self.types = self.header['types']
+        self.min_zoom = self.header['min_zoom']
+        self.max_zoom = self.header['max_zoom']
+        self.levels = {}
+        for zoom, name, typecode, offset, length in self.header['columns']:
+            values = array(typecode)
+            values.frombytes(body[offset:offset + length * values.itemsize])
+            self.levels.setdefault(zoom, {})[name] = values
+
+    def _level(self, zoom):
+        return self.levels[max(self.min_zoom, min(self.max_zoom + 1, int(zoom)))]
+
+    def expansion_zoom(self, zoom, index):
+        """Erste Zoomstufe, in der der Cluster in mehrere Teile zerfällt"""
+        while zoom <= self.max_zoom:
+            level = self.levels[zoom]
+            start, end = level['child_offsets'][index], level['child_offsets'][index + 1]
+            if end - start != 1:
+                return zoom + 1
+            index = level['children'][start]
+            zoom += 1
+        return zoom
+
+    def children(self, zoom, index):
+        """Cluster-IDs ('z/index') der nächstfeineren Ebene"""
+        level = self.levels[zoom]
+        start, end = level['child_offsets'][index], level['child_offsets'][index + 1]
+        return [f"{zoom + 1}/{child}" for child in level['children'][start:end]]
+
+    def query(self, min_lon, min_lat, max_lon, max_lat, zoom):
+        """Cluster und Einzelpunkte einer Zoomstufe innerhalb der Bounding Box"""
+        zoom = max(self.min_zoom, min(self.max_zoom + 1, int(zoom)))
+        level = self.levels[zoom]
+        min_x, max_y = mercator(min_lon, min_lat)
+        max_x, min_y = mercator(max_lon, max_lat)
+        xs, ys = level['x'], level['y']
+        num_types = len(self.types)
+        results = []
+        for i in range(bisect_left(xs, min_x), bisect_right(xs, max_x)):
+            if not min_y <= ys[i] <= max_y:
+                continue
+            lon, lat = inverse_mercator(xs[i], ys[i])
+            entry = {'id': f"{zoom}/{i}", 'coordinates': [round(lon, 6), round(lat, 6)], 'count': level['count'][i]}
+            counts = level['type_counts'][i * num_types:(i + 1) * num_types]
+            if 'feature' in level:
+                entry['feature'] = level['feature'][i]
+                entry['type'] = self.types[counts.index(1)]
+            else:
+                entry['types'] = {self.types[t]: n for t, n in enumerate(counts) if n}
+                if entry['count'] > 1:
+                    entry['expansion_zoom'] = self.expansion_zoom(zoom, i)
+            results.append(entry)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hierarchisches Punkt-Clustering je Zoomstufe')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Cluster-Index aus einem Export erzeugen')
+    build_parser.add_argument('export', nargs='?', default=None, help='Transport-Export (default: neuester GeoJSON-Export)')
+    build_parser.add_argument('--output', '-o', default=INDEX_FILE)
+    build_parser.add_argument('--min-zoom', type=int, default=0)
+    build_parser.add_argument('--max-zoom', type=int, default=16)
+    build_parser.add_argument('--radius', type=int, default=RADIUS_PX, help='Cluster-Radius in Pixeln')
+
+    query_parser = subparsers.add_parser('query', help='Cluster einer Zoomstufe in einer Bounding Box')
+    query_parser.add_argument('min_lon', type=float)
+    query_parser.add_argument('min_lat', type=float)
+    query_parser.add_argument('max_lon', type=float)
+    query_parser.add_argument('max_lat', type=float)
+    query_parser.add_argument('--zoom', '-z', type=int, default=12)
+    query_parser.add_argument('--index', default=INDEX_FILE)
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        header, levels = build_clusters(args.export or latest_export(), args.min_zoom, args.max_zoom, args.radius)
+        save_index(args.output, header, levels)
+        print(f"✓ Cluster-Index aus {header['source']} in {time.perf_counter() - start:.2f} s erstellt")
+        for z in (args.min_zoom, (args.min_zoom + args.max_zoom) // 2, args.max_zoom):
+            print(f"  z{z}: {len(levels[z - args.min_zoom])} Cluster")
+        print(f"  {len(levels[-1])} Punkte, {os.path.getsize(args.output) / 1024:.0f} KB: {args.output}")
+    else:
+        index = ClusterIndex(args.index)
+        start = time.perf_counter()
+        results = index.query(args.min_lon, args.min_lat, args.max_lon, args.max_lat, args.zoom)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for entry in results:
+            if 'feature' in entry:
+                print(f"{entry['id']}: {entry['type']} {entry['coordinates']}")
+            else:
+                types = ', '.join(f"{t}: {n}" for t, n in sorted(entry['types'].items(), key=lambda item: -item[1]))
+                print(f"{entry['id']}: {entry['count']} ({types}) {entry['coordinates']}"
+                      + (f" -> z{entry['expansion_zoom']}" if 'expansion_zoom' in entry else ""))
+        print(f"{len(results)} Einträge in {elapsed_ms:.2f} ms")
+
+if __name__ == "__main__":
+    main()
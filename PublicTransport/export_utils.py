@@ -0,0 +1,71 @@
+import gzip
+import json
+
+_brotli_warned = False
+
+
+def round_coordinates(features, decimals):
+    """
+    Kopie der Features mit auf `decimals` Nachkommastellen gerundeten Koordinaten
+    (6 Stellen ≈ 0,1 m, 5 Stellen ≈ 1 m). decimals=None lässt die Features unverändert.
+    """
+    if decimals is None:
+        return features
+
+    def round_nested(coords):
+        if isinstance(coords, (int, float)):
+            return round(coords, decimals)
+        return [round_nested(c) for c in coords]
+
+    rounded = []
+    for feature in features:
+        geometry = feature.get('geometry')
+        if geometry and 'coordinates' in geometry:
+            feature = dict(feature, geometry=dict(geometry, coordinates=round_nested(geometry['coordinates'])))
+        rounded.append(feature)
+    return rounded
+
+
+def dump_json(data, minify=False):
+    """JSON-Text eines Exports: minifiziert ohne Leerzeichen oder wie bisher mit Einrückung"""
+    if minify:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def _brotli():
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def compressed_suffixes():
+    """Endungen der vorkomprimierten Varianten, die write_compressed_copies erzeugt"""
+    return ['.gz', '.br'] if _brotli() else ['.gz']
+
+
+def write_compressed_copies(path):
+    """
+    Schreibt <path>.gz und, falls das Paket brotli installiert ist, <path>.br neben die Datei,
+    damit statisches Hosting vorkomprimierte Varianten ausliefern kann. Liefert die Pfade.
+    """
+    global _brotli_warned
+    with open(path, 'rb') as f:
+        data = f.read()
+    written = []
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    written.append(path + '.gz')
+
+    brotli = _brotli()
+    if brotli is None:
+        if not _brotli_warned:
+            print("  brotli ist nicht installiert, es werden nur .gz-Dateien geschrieben (pip install brotli)")
+            _brotli_warned = True
+        return written
+    with open(path + '.br', 'wb') as f:
+        f.write(brotli.compress(data, quality=11))
+    written.append(path + '.br')
+    return written
@@ -0,0 +1,153 @@
+import heapq
+import math
+from array import array
+
+from tile_generator import TILE_SIZE, mercator
+
+# Zoomstufen, für die Flächen vereinfacht gespeichert werden
+DEFAULT_ZOOMS = [12, 14, 16]
+
+
+def _project(coords):
+    """[(lon, lat), ...] -> flache array('d') [x0, y0, x1, y1, ...] in Web Mercator [0, 1)"""
+    flat = array('d')
+    for lon, lat in coords:
+        flat.extend(mercator(lon, lat))
+    return flat
+
+
+def simplify_douglas_peucker(flat, tolerance):
+    """
+    Douglas-Peucker auf einer flachen Koordinatenliste, iterativ mit eigenem Stack statt
+    Rekursion. Liefert die Indizes der behaltenen Punkte (erster und letzter immer).
+    """
+    n = len(flat) // 2
+    if n <= 2:
+        return list(range(n))
+    keep = bytearray(n)
+    keep[0] = keep[n - 1] = 1
+    tolerance_sq = tolerance * tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = flat[2 * first], flat[2 * first + 1]
+        bx, by = flat[2 * last], flat[2 * last + 1]
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+        max_dist, index = -1.0, -1
+        for i in range(first + 1, last):
+            px, py = flat[2 * i] - ax, flat[2 * i + 1] - ay
+            if length_sq:
+                t = max(0.0, min(1.0, (px * dx + py * dy) / length_sq))
+                px, py = px - t * dx, py - t * dy
+            dist = px * px + py * py
+            if dist > max_dist:
+                max_dist, index = dist, i
+        if max_dist > tolerance_sq:
+            keep[index] = 1
+            stack.append((first, index))
+            stack.append((index, last))
+    return [i for i in range(n) if keep[i]]
+
+
+def simplify_visvalingam(flat, min_area):
+    """
+    Visvalingam-Whyatt: entfernt wiederholt den Punkt mit dem kleinsten effektiven Dreieck,
+    solange dieses kleiner als min_area ist (Heap mit verzögertem Löschen). Liefert Indizes.
+    """
+    n = len(flat) // 2
+    if n <= 3:
+        return list(range(n))
+
+    def area(a, b, c):
+        return abs((flat[2 * a] - flat[2 * c]) * (flat[2 * b + 1] - flat[2 * a + 1])
+                   - (flat[2 * a] - flat[2 * b]) * (flat[2 * c + 1] - flat[2 * a + 1])) / 2
+
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+    removed = bytearray(n)
+    current = [0.0] * n
+    heap = []
+    for i in range(1, n - 1):
+        current[i] = area(i - 1, i, i + 1)
+        heap.append((current[i], i))
+    heapq.heapify(heap)
+    remaining = n
+    while heap and remaining > 3:
+        value, i = heapq.heappop(heap)
+        if removed[i] or value != current[i]:
+            continue
+        if value >= min_area:
+            break
+        removed[i] = 1
+        remaining -= 1
+        p, q = prev[i], nxt[i]
+        nxt[p], prev[q] = q, p
+        for j in (p, q):
+            if 0 < j < n - 1:
+                # Effektive Fläche wächst monoton, wie bei Visvalingam-Whyatt üblich
+                current[j] = max(area(prev[j], j, nxt[j]), value)
+                heapq.heappush(heap, (current[j], j))
+    return [i for i in range(n) if not removed[i]]
+
+
+def pixel_size(zoom):
+    """Kantenlänge eines Pixels bei Zoomstufe zoom in Web-Mercator-Einheiten"""
+    return 1.0 / (TILE_SIZE * 2 ** zoom)
+
+
+def encode_ring(flat, indices, zoom):
+    """
+    Quantisiert die behaltenen Punkte auf das Pixelraster der Zoomstufe und kodiert sie als
+    Differenzen: [x0, y0, dx1, dy1, ...]. Aufeinanderfolgende gleiche Punkte entfallen.
+    """
+    scale = TILE_SIZE * 2 ** zoom
+    encoded = []
+    last_x = last_y = None
+    for i in indices:
+        x, y = int(round(flat[2 * i] * scale)), int(round(flat[2 * i + 1] * scale))
+        if last_x is None:
+            encoded.extend((x, y))
+        elif (x, y) != (last_x, last_y):
+            encoded.extend((x - last_x, y - last_y))
+        else:
+            continue
+        last_x, last_y = x, y
+    return encoded
+
+
+def decode_ring(encoded, zoom):
+    """Umkehrung von encode_ring: [[lon, lat], ...] auf Pixelgenauigkeit"""
+    scale = TILE_SIZE * 2 ** zoom
+    coords = []
+    x = y = 0
+    for k in range(0, len(encoded), 2):
+        if k == 0:
+            x, y = encoded[0], encoded[1]
+        else:
+            x, y = x + encoded[k], y + encoded[k + 1]
+        lon = x / scale * 360.0 - 180.0
+        lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / scale))))
+        coords.append([round(lon, 7), round(lat, 7)])
+    return coords
+
+
+def simplify_area(coords, zooms=DEFAULT_ZOOMS, method='douglas-peucker'):
+    """
+    Vereinfacht einen geschlossenen Ring (Liste von (lon, lat)) für jede Zoomstufe mit einer
+    Toleranz von einem Pixel und liefert {zoom: kodierter Ring}. Zoomstufen, in denen die Fläche
+    zu weniger als drei Punkten zusammenfällt, werden ausgelassen.
+    """
+    flat = _project(coords)
+    result = {}
+    for zoom in zooms:
+        tolerance = pixel_size(zoom)
+        if method == 'visvalingam':
+            indices = simplify_visvalingam(flat, tolerance * tolerance)
+        else:
+            indices = simplify_douglas_peucker(flat, tolerance)
+        encoded = encode_ring(flat, indices, zoom)
+        # geschlossener Ring: mindestens drei verschiedene Punkte plus Schlusspunkt
+        if len(encoded) >= 8:
+            result[str(zoom)] = encoded
+    return result
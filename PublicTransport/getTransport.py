@@ -7,13 +7,34 @@ import time
 import csv
 import argparse
 
+from export_utils import dump_json, round_coordinates, write_compressed_copies
+from geometry_simplify import DEFAULT_ZOOMS, simplify_area
+from sharding import write_shards
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shared'))
+from profiling import add_profile_arguments, phase, profiled, profiler_from_args
+
 class QuattropoleTransportDownloader:
-    def __init__(self, config_file="quattropole_cities.json"):
+    def __init__(self, config_file="quattropole_cities.json", parking_geometry=False,
+                 geometry_zooms=None, simplify_method='douglas-peucker', precision=None, minify=False,
+                 compress=False, shards=False, workers=4):
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
         self.config_file = config_file
         self.cities_config = self.load_cities_config()
         self.all_features = []
         self.current_city = None
+        # Optional: Umrisse der Parkflächen (Ways) statt nur ihres Mittelpunkts
+        self.parking_geometry = parking_geometry
+        self.geometry_zooms = geometry_zooms or DEFAULT_ZOOMS
+        self.simplify_method = simplify_method
+        self.parking_areas = []
+        # Exportoptionen: Nachkommastellen der Koordinaten, kompaktes JSON, .gz/.br-Dateien
+        self.precision = precision
+        self.minify = minify
+        self.compress = compress
+        # Zusätzlich eine Datei je Stadt × Typ plus Manifest, parallel geschrieben
+        self.shards = shards
+        self.workers = workers
         
     def load_cities_config(self):
         """Lädt die Städte-Konfiguration"""
@@ -32,11 +53,13 @@ class QuattropoleTransportDownloader:
         overpass_url = "http://overpass-api.de/api/interpreter"
         
         try:
-            response = requests.post(overpass_url, data=query, timeout=60)
+            with phase('fetch'):
+                response = requests.post(overpass_url, data=query, timeout=60)
             
             if response.status_code == 200:
                 try:
-                    data = response.json()
+                    with phase('parse'):
+                        data = response.json()
                     if 'elements' in data:
                         print(f"  ✓ {len(data['elements'])} Objekte gefunden")
                         return data['elements']
@@ -54,6 +77,7 @@ class QuattropoleTransportDownloader:
             print(f"  ✗ Fehler: {e}")
             return []
 
+    @profiled('classify')
     def download_bus_stops(self, bbox):
         """Lädt alle Bushaltestellen in der gegebenen Bounding Box"""
         query = f"""
@@ -95,6 +119,7 @@ class QuattropoleTransportDownloader:
                 }
                 self.all_features.append(feature)
 
+    @profiled('classify')
     def download_train_stations(self, bbox):
         """Lädt alle Bahnhöfe in der gegebenen Bounding Box"""
         query = f"""
@@ -135,8 +160,10 @@ class QuattropoleTransportDownloader:
                 }
                 self.all_features.append(feature)
 
+    @profiled('classify')
     def download_parking(self, bbox):
-        """Lädt Parkplätze und Park+Ride"""
+        """Lädt Parkplätze und Park+Ride (mit parking_geometry zusätzlich die Umrisse der Flächen)"""
+        output = "out geom;" if self.parking_geometry else "out center;"
         query = f"""
         [out:json][timeout:60];
         (
@@ -145,7 +172,7 @@ class QuattropoleTransportDownloader:
           node["park_ride"="yes"]({bbox['south']},{bbox['west']},{bbox['north']},{bbox['east']});
           way["park_ride"="yes"]({bbox['south']},{bbox['west']},{bbox['north']},{bbox['east']});
         );
-        out center;
+        {output}
         """
         
         elements = self.query_overpass_api(query, "Parkplätze")
@@ -153,6 +180,12 @@ class QuattropoleTransportDownloader:
         for element in elements:
             lat = element.get('lat') or (element.get('center', {}).get('lat'))
             lon = element.get('lon') or (element.get('center', {}).get('lon'))
+            ring = [(p['lon'], p['lat']) for p in element.get('geometry') or [] if p]
+            if ring and not (lat and lon):
+                # Mittelpunkt wie bei "out center": Mitte der Bounding Box
+                bounds = element.get('bounds') or {}
+                lat = (bounds['minlat'] + bounds['maxlat']) / 2 if bounds else sum(p[1] for p in ring) / len(ring)
+                lon = (bounds['minlon'] + bounds['maxlon']) / 2 if bounds else sum(p[0] for p in ring) / len(ring)
             
             if lat and lon:
                 tags = element.get('tags', {})
@@ -181,7 +214,19 @@ class QuattropoleTransportDownloader:
                     }
                 }
                 self.all_features.append(feature)
+                
+                if len(ring) >= 4 and ring[0] == ring[-1]:
+                    geometry = simplify_area(ring, self.geometry_zooms, self.simplify_method)
+                    if geometry:
+                        self.parking_areas.append({
+                            "osm_id": element['id'],
+                            "name": name,
+                            "type": park_type,
+                            "city": self.current_city['name'],
+                            "geometry": geometry
+                        })
 
+    @profiled('classify')
     def download_bike_infrastructure(self, bbox):
         """Lädt Fahrrad-Infrastruktur"""
         query = f"""
@@ -234,6 +279,7 @@ class QuattropoleTransportDownloader:
                 }
                 self.all_features.append(feature)
 
+    @profiled('classify')
     def download_ev_charging(self, bbox):
         """Lädt E-Auto Ladestationen"""
         query = f"""
@@ -274,6 +320,7 @@ class QuattropoleTransportDownloader:
                 }
                 self.all_features.append(feature)
 
+    @profiled('classify')
     def download_taxi_stands(self, bbox):
         """Lädt Taxistände"""
         query = f"""
@@ -395,9 +442,10 @@ class QuattropoleTransportDownloader:
         cities_suffix = "_".join(city_keys) if len(city_keys) <= 2 else "all"
         
         # GeoJSON speichern
+        features = round_coordinates(self.all_features, self.precision)
         geojson = {
             "type": "FeatureCollection",
-            "features": self.all_features,
+            "features": features,
             "metadata": {
                 "generated": datetime.now().isoformat(),
                 "source": "OpenStreetMap via Overpass API",
@@ -413,7 +461,7 @@ class QuattropoleTransportDownloader:
         geojson_path = os.path.join(output_dir, geojson_file)
         
         with open(geojson_path, 'w', encoding='utf-8') as f:
-            json.dump(geojson, f, indent=2, ensure_ascii=False)
+            f.write(dump_json(geojson, self.minify))
         
         # CSV speichern
         csv_file = f"quattropole_{cities_suffix}_{timestamp}.csv"
@@ -421,9 +469,9 @@ class QuattropoleTransportDownloader:
         
         with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
             writer = csv.writer(csvfile, delimiter=';')
-            writer.writerow(['Name', 'Typ', 'Stadt', 'Land', 'Längengrad', 'Breitengrad', 'Quelle', 'Operator', 'Details'])
+            writer.writerow(['Name', 'Typ', 'Stadt', 'Land', 'Längengrad', 'Breitengrad', 'Quelle', 'Operator', 'Details', 'OSM-ID'])
             
-            for feature in self.all_features:
+            for feature in features:
                 props = feature['properties']
                 coords = feature['geometry']['coordinates']
                 
@@ -442,13 +490,44 @@ class QuattropoleTransportDownloader:
                     coords[1] if len(coords) > 1 else '',
                     props.get('source', ''),
                     props.get('operator', ''),
-                    '; '.join(details)
+                    '; '.join(details),
+                    props.get('osm_id', '')
                 ])
         
+        # Parkflächen: je Zoomstufe vereinfacht, Koordinaten als Pixel-Differenzen
+        areas_file = None
+        artifacts = [geojson_path, csv_path]
+        if self.parking_areas:
+            areas_file = f"quattropole_{cities_suffix}_{timestamp}_parkflaechen.json"
+            artifacts.append(os.path.join(output_dir, areas_file))
+            with open(artifacts[-1], 'w', encoding='utf-8') as f:
+                json.dump({
+                    "format": "quattropole-areas/1",
+                    "encoding": "Web-Mercator-Pixel (256 px Kacheln) je Zoomstufe, [x0, y0, dx1, dy1, ...]",
+                    "simplification": self.simplify_method,
+                    "zooms": self.geometry_zooms,
+                    "areas": self.parking_areas
+                }, f, ensure_ascii=False, separators=(',', ':'))
+        
+        compressed = []
+        if self.compress:
+            for path in artifacts:
+                compressed.extend(write_compressed_copies(path))
+        
         print(f"\n✓ Daten gespeichert:")
-        print(f"  GeoJSON: {geojson_file}")
-        print(f"  CSV: {csv_file}")
+        print(f"  GeoJSON: {geojson_file} ({os.path.getsize(geojson_path) / 1024:.0f} KB)")
+        print(f"  CSV: {csv_file} ({os.path.getsize(csv_path) / 1024:.0f} KB)")
+        if areas_file:
+            print(f"  Parkflächen: {areas_file} ({len(self.parking_areas)} Flächen)")
+        for path in compressed:
+            print(f"  {os.path.basename(path)} ({os.path.getsize(path) / 1024:.0f} KB)")
+        if self.shards:
+            shard_dir = os.path.join(output_dir, f"quattropole_{cities_suffix}_{timestamp}_shards")
+            manifest = write_shards(self.all_features, shard_dir, self.precision, self.minify,
+                                    self.compress, self.workers)
+            print(f"  Shards: {os.path.basename(shard_dir)}/ ({len(manifest['shards'])} Dateien + manifest.json)")
         print(f"  Pfad: {output_dir}")
+        return geojson_path
 
     def run(self, cities=None):
         """Hauptmethode - lädt Daten für ausgewählte Städte"""
@@ -481,7 +560,8 @@ class QuattropoleTransportDownloader:
                 continue
         
         # Ergebnisse speichern
-        self.save_results(cities, timestamp)
+        with phase('export'):
+            return self.save_results(cities, timestamp)
 
 def main():
     parser = argparse.ArgumentParser(description='Quattropole Transport Data Downloader')
@@ -489,6 +569,25 @@ def main():
                        choices=['trier', 'luxembourg', 'metz', 'saarbruecken', 'all'],
                        default=['all'],
                        help='Städte zum Download (default: all)')
+    parser.add_argument('--parking-geometry', action='store_true',
+                       help='Umrisse der Parkflächen laden und je Zoomstufe vereinfacht speichern')
+    parser.add_argument('--geometry-zooms', type=int, nargs='+', default=DEFAULT_ZOOMS,
+                       help=f'Zoomstufen der Parkflächen (default: {" ".join(map(str, DEFAULT_ZOOMS))})')
+    parser.add_argument('--simplify', choices=['douglas-peucker', 'visvalingam'], default='douglas-peucker',
+                       help='Vereinfachungsverfahren der Parkflächen (default: douglas-peucker)')
+    parser.add_argument('--precision', type=int, default=None,
+                       help='Nachkommastellen der Koordinaten, z.B. 6 (≈ 0,1 m); default: volle Genauigkeit')
+    parser.add_argument('--minify', action='store_true', help='GeoJSON ohne Einrückung schreiben')
+    parser.add_argument('--compress', action='store_true',
+                       help='Vorkomprimierte .gz- (und mit brotli .br-)Dateien neben jede Ausgabe schreiben')
+    parser.add_argument('--shards', action='store_true',
+                       help='Zusätzlich eine GeoJSON-Datei je Stadt und Typ plus manifest.json schreiben')
+    parser.add_argument('--workers', type=int, default=4, help='Threads zum Schreiben der Shards (default: 4)')
+    parser.add_argument('--tiles', action='store_true',
+                       help='Nach dem Export GeoJSON-Kacheln erzeugen (siehe tile_generator.py)')
+    parser.add_argument('--min-zoom', type=int, default=10, help='Kleinste Zoomstufe der Kacheln (default: 10)')
+    parser.add_argument('--max-zoom', type=int, default=16, help='Größte Zoomstufe der Kacheln (default: 16)')
+    add_profile_arguments(parser, language='de')
     
     args = parser.parse_args()
     
@@ -498,8 +597,26 @@ def main():
     else:
         cities = args.cities
     
-    downloader = QuattropoleTransportDownloader()
-    downloader.run(cities)
+    downloader = QuattropoleTransportDownloader(parking_geometry=args.parking_geometry,
+                                                geometry_zooms=args.geometry_zooms,
+                                                simplify_method=args.simplify,
+                                                precision=args.precision,
+                                                minify=args.minify,
+                                                compress=args.compress,
+                                                shards=args.shards,
+                                                workers=args.workers)
+    # Phasen: fetch (Overpass), parse (JSON), classify (Features bauen), export (Dateien, Kacheln)
+    profiler = profiler_from_args(args, 'getTransport')
+    try:
+        geojson_path = downloader.run(cities)
+        
+        if args.tiles and geojson_path:
+            from tile_generator import generate_tiles
+            with phase('export'):
+                generate_tiles(geojson_path, min_zoom=args.min_zoom, max_zoom=args.max_zoom)
+    finally:
+        if profiler:
+            profiler.stop()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
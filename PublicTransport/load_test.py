@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+# Städte-Bounding-Boxes aus quattropole_cities.json, um realistische Anfragen zu erzeugen
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'quattropole_cities.json')
+
+
+def load_city_bboxes():
+    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        cities = json.load(f)['cities']
+    return [city['bbox'] for city in cities.values()]
+
+
+def random_target(bboxes, rng):
+    """Zufällige Anfrage: Kartenausschnitt, nächste Haltestellen oder Umkreis"""
+    bbox = rng.choice(bboxes)
+    south, west, north, east = bbox['south'], bbox['west'], bbox['north'], bbox['east']
+    lon, lat = rng.uniform(west, east), rng.uniform(south, north)
+    kind = rng.random()
+    if kind < 0.6:
+        span = rng.choice([0.005, 0.01, 0.02])
+        return f"/bbox?bbox={lon:.5f},{lat:.5f},{lon + span:.5f},{lat + span * 0.66:.5f}"
+    if kind < 0.85:
+        return f"/nearest?lon={lon:.5f}&lat={lat:.5f}&k=10&type=Bushaltestelle"
+    return f"/within?lon={lon:.5f}&lat={lat:.5f}&radius=500"
+
+
+async def client(host, port, targets, latencies, errors):
+    """Eine Keep-Alive-Verbindung, die ihre Anfragen nacheinander abarbeitet"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for target in targets:
+            start = time.perf_counter()
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\nAccept-Encoding: gzip\r\n\r\n".encode('latin-1'))
+            await writer.drain()
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if b' 200 ' not in status_line:
+                errors.append(status_line.decode('latin-1').strip())
+    finally:
+        writer.close()
+
+
+async def run_load_test(host, port, total, concurrency, seed):
+    rng = random.Random(seed)
+    bboxes = load_city_bboxes()
+    targets = [random_target(bboxes, rng) for _ in range(total)]
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, targets[i::concurrency], latencies, errors) for i in range(concurrency)))
+    return time.perf_counter() - start, sorted(latencies), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lasttest für query_service.py')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--requests', '-n', type=int, default=2000)
+    parser.add_argument('--concurrency', '-c', type=int, default=20, help='Gleichzeitige Verbindungen')
+    parser.add_argument('--seed', type=int, default=1)
+
+    args = parser.parse_args()
+
+    elapsed, latencies, errors = asyncio.run(run_load_test(args.host, args.port, args.requests, args.concurrency, args.seed))
+    if not latencies:
+        print("Keine Antworten erhalten")
+        return
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    print(f"{len(latencies)} Anfragen in {elapsed:.2f} s mit {args.concurrency} Verbindungen")
+    print(f"  Durchsatz: {len(latencies) / elapsed:.0f} Anfragen/s")
+    print(f"  Latenz: p50 {percentile(0.5):.1f} ms, p95 {percentile(0.95):.1f} ms, p99 {percentile(0.99):.1f} ms, "
+          f"max {latencies[-1] * 1000:.1f} ms")
+    print(f"  Fehler: {len(errors)}" + (f" (z.B. {errors[0]})" if errors else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+import argparse
+import asyncio
+import gzip
+import heapq
+import json
+import math
+import os
+import time
+from array import array
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+from transport_data import latest_export, load_snapshot
+
+PLACES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ai-assistant', 'server', 'scripts')
+# Geokodierte Orte aus den Scrapern: Datei -> Typ
+PLACE_FILES = {
+    'sb_shops.json': 'Geschäft',
+    'sb_gastro.json': 'Gastronomie',
+    'sb_sights.json': 'Sehenswürdigkeit',
+}
+GRID_SIZE = 0.01  # Zellgröße des räumlichen Index in Grad (~1 km)
+BBOX_QUANTUM = 0.001  # Bounding Boxes werden für den Cache auf ~100 m nach außen gerundet
+MAX_RESULTS = 5000
+GZIP_MIN_BYTES = 1024
+EARTH_RADIUS_M = 6371008.8
+
+
+def haversine_m(lon1, lat1, lon2, lat2):
+    lon1, lat1, lon2, lat2 = map(math.radians, (lon1, lat1, lon2, lat2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def _check_finite(*values):
+    if not all(math.isfinite(v) for v in values):
+        raise ValueError('Koordinaten müssen endliche Zahlen sein')
+
+
+def _check_positive(name, value):
+    if value < 1:
+        raise ValueError(f'{name} muss mindestens 1 sein')
+    return value
+
+
+def quantize_bbox(min_lon, min_lat, max_lon, max_lat, quantum=BBOX_QUANTUM):
+    """Rundet eine Bounding Box nach außen auf ein Raster, damit ähnliche Anfragen denselben Cache-Eintrag treffen"""
+    return (math.floor(min_lon / quantum) * quantum, math.floor(min_lat / quantum) * quantum,
+            math.ceil(max_lon / quantum) * quantum, math.ceil(max_lat / quantum) * quantum)
+
+
+class PointIndex:
+    """
+    Alle Punkte (Transport-Features und Orte) in Spalten mit einem Gitter-Index:
+    jede Zelle von GRID_SIZE Grad enthält die Indizes ihrer Punkte.
+    """
+
+    def __init__(self):
+        self.lon = array('d')
+        self.lat = array('d')
+        self.types = []
+        self.cities = []
+        self.features = []
+        self.grid = {}
+        # Belegter Zellbereich [min_x, min_y, max_x, max_y], begrenzt die Schleifen über das Gitter
+        self.cell_bounds = None
+
+    def add(self, lon, lat, feature_type, city, feature):
+        if lon is None or lat is None or math.isnan(lon) or math.isnan(lat):
+            return
+        index = len(self.features)
+        self.lon.append(lon)
+        self.lat.append(lat)
+        self.types.append(feature_type)
+        self.cities.append(city)
+        self.features.append(feature)
+        cell = self._cell(lon, lat)
+        self.grid.setdefault(cell, array('I')).append(index)
+        if self.cell_bounds is None:
+            self.cell_bounds = [cell[0], cell[1], cell[0], cell[1]]
+        else:
+            bounds = self.cell_bounds
+            bounds[0], bounds[1] = min(bounds[0], cell[0]), min(bounds[1], cell[1])
+            bounds[2], bounds[3] = max(bounds[2], cell[0]), max(bounds[3], cell[1])
+
+    @staticmethod
+    def _cell(lon, lat):
+        return int(math.floor(lon / GRID_SIZE)), int(math.floor(lat / GRID_SIZE))
+
+    def __len__(self):
+        return len(self.features)
+
+    def _matches(self, index, feature_type, city):
+        return (feature_type is None or self.types[index] == feature_type) and (city is None or self.cities[index] == city)
+
+    def _cells_in(self, min_x, min_y, max_x, max_y):
+        """
+        Belegte Zellen im Zellbereich, sortiert nach (x, y). Der Bereich wird auf die belegten
+        Zellen beschnitten; ist er dann noch größer als das Gitter, werden dessen Schlüssel gefiltert.
+        """
+        if self.cell_bounds is None:
+            return []
+        min_x, min_y = max(min_x, self.cell_bounds[0]), max(min_y, self.cell_bounds[1])
+        max_x, max_y = min(max_x, self.cell_bounds[2]), min(max_y, self.cell_bounds[3])
+        if min_x > max_x or min_y > max_y:
+            return []
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self.grid):
+            return sorted(cell for cell in self.grid
+                          if min_x <= cell[0] <= max_x and min_y <= cell[1] <= max_y)
+        return [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1) if (x, y) in self.grid]
+
+    def bbox(self, min_lon, min_lat, max_lon, max_lat, feature_type=None, city=None, limit=MAX_RESULTS):
+        min_x, min_y = self._cell(min_lon, min_lat)
+        max_x, max_y = self._cell(max_lon, max_lat)
+        result = []
+        for cell in self._cells_in(min_x, min_y, max_x, max_y):
+            for i in self.grid[cell]:
+                if (min_lon <= self.lon[i] <= max_lon and min_lat <= self.lat[i] <= max_lat
+                        and self._matches(i, feature_type, city)):
+                    result.append(i)
+                    if len(result) >= limit:
+                        return result
+        return result
+
+    def within(self, lon, lat, radius_m, feature_type=None, city=None, limit=MAX_RESULTS):
+        """Punkte im Umkreis, nach Entfernung sortiert, als (Entfernung, Index)"""
+        # Suchfenster auf die ganze Erde begrenzt, damit riesige Radien endlich bleiben
+        dlat = min(math.degrees(radius_m / EARTH_RADIUS_M), 180.0)
+        dlon = min(dlat / max(math.cos(math.radians(lat)), 1e-6), 360.0)
+        found = []
+        for i in self.bbox(lon - dlon, lat - dlat, lon + dlon, lat + dlat, feature_type, city, limit=len(self)):
+            distance = haversine_m(lon, lat, self.lon[i], self.lat[i])
+            if distance <= radius_m:
+                found.append((distance, i))
+        found.sort()
+        return found[:limit]
+
+    @staticmethod
+    def _ring_cells(cx, cy, ring):
+        """Zellen mit Chebyshev-Abstand ring um (cx, cy)"""
+        if ring == 0:
+            return [(cx, cy)]
+        cells = [(x, y) for x in range(cx - ring, cx + ring + 1) for y in (cy - ring, cy + ring)]
+        cells.extend((x, y) for x in (cx - ring, cx + ring) for y in range(cy - ring + 1, cy + ring))
+        return cells
+
+    def nearest(self, lon, lat, k=10, feature_type=None, city=None):
+        """
+        Die k nächsten Punkte. Das Gitter wird ringweise um die Startzelle abgesucht, bis der
+        k-te Treffer näher liegt als jeder Punkt eines weiteren Rings sein kann. Sobald ein Ring
+        mehr Zellen kosten würde als das Gitter hat, werden nur noch die belegten Zellen nach Ring
+        sortiert besucht.
+        """
+        cx, cy = self._cell(lon, lat)
+        cell_m = math.radians(GRID_SIZE) * EARTH_RADIUS_M * max(math.cos(math.radians(lat)), 1e-6)
+
+        def ring_of(cell):
+            return max(abs(cell[0] - cx), abs(cell[1] - cy))
+
+        def ring_groups():
+            # Ringweise, solange insgesamt nicht mehr Zellen geprüft werden als das Gitter hat
+            ring = scanned = 0
+            while scanned + 8 * ring <= len(self.grid):
+                yield ring, [cell for cell in self._ring_cells(cx, cy, ring) if cell in self.grid]
+                scanned += max(1, 8 * ring)
+                ring += 1
+            outer = sorted((ring_of(cell), cell) for cell in self.grid if ring_of(cell) >= ring)
+            for r, cell in outer:
+                yield r, [cell]
+
+        heap = []  # max-heap über (-Entfernung, Index)
+        for ring, cells in ring_groups():
+            if len(heap) >= k and -heap[0][0] <= (ring - 1) * cell_m:
+                break
+            for cell in cells:
+                for i in self.grid[cell]:
+                    if not self._matches(i, feature_type, city):
+                        continue
+                    distance = haversine_m(lon, lat, self.lon[i], self.lat[i])
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-distance, i))
+                    elif distance < -heap[0][0]:
+                        heapq.heapreplace(heap, (-distance, i))
+        return sorted((-d, i) for d, i in heap)
+
+    def type_counts(self):
+        counts = {}
+        for city, feature_type in zip(self.cities, self.types):
+            counts.setdefault(city, {})
+            counts[city][feature_type] = counts[city].get(feature_type, 0) + 1
+        return counts
+
+
+def load_places(index, places_dir=PLACES_DIR):
+    """Fügt die geokodierten Orte (Geschäfte, Gastronomie, Sehenswürdigkeiten) hinzu"""
+    for filename, feature_type in PLACE_FILES.items():
+        path = os.path.join(places_dir, filename)
+        if not os.path.exists(path):
+            print(f"  ✗ {filename} nicht gefunden")
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        for entry in entries:
+            loc = entry.get('location') or {}
+            properties = {
+                'name': entry.get('name', ''),
+                'type': feature_type,
+                'city': 'Saarbrücken',
+                'address': entry.get('address', ''),
+                'categories': entry.get('category') or entry.get('categories') or [],
+                'website': entry.get('website') or (entry.get('websites') or [''])[0],
+            }
+            index.add(loc.get('longitude'), loc.get('latitude'), feature_type, 'Saarbrücken',
+                      {'type': 'Feature', 'properties': properties,
+                       'geometry': {'type': 'Point', 'coordinates': [loc.get('longitude'), loc.get('latitude')]}})
+        print(f"  ✓ {len(entries)} {feature_type} aus {filename}")
+
+
+def build_index(export_path=None, places_dir=PLACES_DIR):
+    index = PointIndex()
+    snapshot = load_snapshot(export_path)
+    print(f"Lade {snapshot.path}...")
+    for i in range(len(snapshot)):
+        index.add(snapshot.lon[i], snapshot.lat[i], snapshot.type_of(i), snapshot.city_of(i), snapshot.feature(i))
+    print(f"  ✓ {len(snapshot)} Transport-Features")
+    load_places(index, places_dir)
+    return index
+
+
+class QueryService:
+    """
+    Asynchroner HTTP-Server (nur asyncio, keine externen Pakete) über dem PointIndex.
+
+    Endpunkte (alle GET, Antwort kompaktes JSON, gzip wenn vom Client akzeptiert):
+      /bbox?bbox=min_lon,min_lat,max_lon,max_lat[&type=&city=&limit=]
+      /nearest?lon=&lat=[&k=10&type=&city=]
+      /within?lon=&lat=&radius=<Meter>[&type=&city=&limit=]
+      /types
+    Antworten landen in einem LRU-Cache; /bbox-Anfragen werden dafür auf BBOX_QUANTUM gerundet.
+    """
+
+    def __init__(self, index, cache_size=1024):
+        self.index = index
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.requests = 0
+        self.cache_hits = 0
+
+    def _features(self, indices, distances=None):
+        features = []
+        for n, i in enumerate(indices):
+            feature = self.index.features[i]
+            if distances is not None:
+                feature = dict(feature, properties=dict(feature['properties'], distance_m=round(distances[n], 1)))
+            features.append(feature)
+        return {'type': 'FeatureCollection', 'features': features}
+
+    def handle_query(self, path, params):
+        """Liefert (Status, Cache-Schlüssel, Antwort-Objekt)"""
+        def param(name, default=None, cast=str):
+            values = params.get(name)
+            return cast(values[0]) if values else default
+
+        feature_type, city = param('type'), param('city')
+        if path == '/types':
+            return 200, ('/types',), {'total': len(self.index), 'types': self.index.type_counts()}
+        if path == '/bbox':
+            bbox = [float(v) for v in param('bbox', '').split(',')]
+            if len(bbox) != 4:
+                raise ValueError('bbox=min_lon,min_lat,max_lon,max_lat erwartet')
+            _check_finite(*bbox)
+            bbox = quantize_bbox(*bbox)
+            limit = min(_check_positive('limit', param('limit', MAX_RESULTS, int)), MAX_RESULTS)
+            key = ('/bbox', tuple(round(v, 6) for v in bbox), feature_type, city, limit)
+            return 200, key, lambda: self._features(self.index.bbox(*bbox, feature_type=feature_type, city=city, limit=limit))
+        if path in ('/nearest', '/within'):
+            lon, lat = param('lon', None, float), param('lat', None, float)
+            if lon is None or lat is None:
+                raise ValueError('lon und lat erwartet')
+            _check_finite(lon, lat)
+            if path == '/nearest':
+                k = min(_check_positive('k', param('k', 10, int)), MAX_RESULTS)
+                key = ('/nearest', round(lon, 5), round(lat, 5), k, feature_type, city)
+                query = lambda: self.index.nearest(lon, lat, k, feature_type, city)
+            else:
+                radius = param('radius', 500, float)
+                if not math.isfinite(radius) or radius < 0:
+                    raise ValueError('radius muss eine Entfernung in Metern >= 0 sein')
+                limit = min(_check_positive('limit', param('limit', MAX_RESULTS, int)), MAX_RESULTS)
+                key = ('/within', round(lon, 5), round(lat, 5), radius, feature_type, city, limit)
+                query = lambda: self.index.within(lon, lat, radius, feature_type, city, limit)
+
+            def run():
+                found = query()
+                return self._features([i for _, i in found], [d for d, _ in found])
+            return 200, key, run
+        return 404, None, {'error': f'Unbekannter Endpunkt: {path}'}
+
+    def respond(self, target, accepts_gzip):
+        """Liefert (Status, Body, gzip) für ein Request-Target, mit LRU-Cache"""
+        self.requests += 1
+        parts = urlsplit(target)
+        try:
+            status, key, result = self.handle_query(parts.path, parse_qs(parts.query))
+        except ValueError as e:
+            return 400, json.dumps({'error': str(e)}, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), False
+        except Exception as e:
+            return self._server_error(target, e)
+
+        if key is not None:
+            cache_key = key + (accepts_gzip,)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.cache.move_to_end(cache_key)
+                self.cache_hits += 1
+                return cached
+        if callable(result):
+            try:
+                result = result()
+            except Exception as e:
+                return self._server_error(target, e)
+        body = json.dumps(result, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        compressed = accepts_gzip and len(body) >= GZIP_MIN_BYTES
+        if compressed:
+            body = gzip.compress(body, compresslevel=5)
+        response = (status, body, compressed)
+        if key is not None:
+            self.cache[cache_key] = response
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return response
+
+    @staticmethod
+    def _server_error(target, error):
+        print(f"  ✗ Fehler bei {target}: {error!r}")
+        return 500, b'{"error":"Interner Fehler"}', False
+
+    async def handle_connection(self, reader, writer):
+        """HTTP/1.1 mit Keep-Alive: mehrere Anfragen pro Verbindung"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                if method != 'GET':
+                    status, body, compressed = 405, b'{"error":"Nur GET"}', False
+                else:
+                    status, body, compressed = self.respond(target, 'gzip' in headers.get('accept-encoding', ''))
+
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                          500: 'Internal Server Error'}[status]
+                head = [f'HTTP/1.1 {status} {reason}',
+                        'Content-Type: application/json; charset=utf-8',
+                        f'Content-Length: {len(body)}',
+                        'Access-Control-Allow-Origin: *',
+                        'Vary: Accept-Encoding',
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                if compressed:
+                    head.append('Content-Encoding: gzip')
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(service, host, port):
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"\n✓ Query-Service läuft auf http://{host}:{port} (/bbox, /nearest, /within, /types)")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTTP Query-Service für Transport-Features und Orte')
+    parser.add_argument('--export', default=None,
+                        help='Transport-Export (CSV oder GeoJSON, default: neuester GeoJSON-Export)')
+    parser.add_argument('--places-dir', default=PLACES_DIR, help='Verzeichnis mit sb_shops.json, sb_gastro.json, sb_sights.json')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--cache-size', type=int, default=1024, help='Einträge im Antwort-Cache')
+
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = build_index(args.export or latest_export(), args.places_dir)
+    print(f"Index mit {len(index)} Punkten in {(time.perf_counter() - start) * 1000:.0f} ms aufgebaut")
+    try:
+        asyncio.run(serve(QueryService(index, args.cache_size), args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nQuery-Service beendet")
+
+if __name__ == "__main__":
+    main()
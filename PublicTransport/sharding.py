@@ -0,0 +1,120 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from export_utils import dump_json, round_coordinates, write_compressed_copies
+from tile_generator import layer_slug
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def _bbox(features):
+    lons = [f['geometry']['coordinates'][0] for f in features]
+    lats = [f['geometry']['coordinates'][1] for f in features]
+    return [round(min(lons), 6), round(min(lats), 6), round(max(lons), 6), round(max(lats), 6)]
+
+
+def _write_shard(output_dir, city, feature_type, features, minify, compress):
+    rel_path = f"{layer_slug(city)}/{layer_slug(feature_type)}.geojson"
+    data = dump_json({'type': 'FeatureCollection', 'features': features}, minify).encode('utf-8')
+    path = os.path.join(output_dir, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    if compress:
+        write_compressed_copies(path)
+    return {
+        'city': city,
+        'type': feature_type,
+        'path': rel_path,
+        'count': len(features),
+        'bbox': _bbox(features),
+        'bytes': len(data),
+        'sha256': hashlib.sha256(data).hexdigest(),
+    }
+
+
+def write_shards(features, output_dir, precision=None, minify=False, compress=False, workers=4):
+    """
+    Schreibt je Stadt × Typ eine GeoJSON-Datei <stadt>/<typ>.geojson (parallel in `workers`
+    Threads) und eine manifest.json mit Pfad, Anzahl, Bounding Box und SHA-256 je Shard.
+    """
+    groups = {}
+    for feature in round_coordinates(features, precision):
+        props = feature['properties']
+        groups.setdefault((props['city'], props['type']), []).append(feature)
+
+    # Wie bei den Kacheln: nur einen früheren Shard-Satz ersetzen
+    if os.path.exists(os.path.join(output_dir, MANIFEST_FILE)):
+        shutil.rmtree(output_dir)
+    elif os.path.isdir(output_dir) and os.listdir(output_dir):
+        raise FileExistsError(f"{output_dir} ist nicht leer und enthält keine {MANIFEST_FILE}")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_write_shard, output_dir, city, feature_type, group, minify, compress)
+                   for (city, feature_type), group in sorted(groups.items())]
+        shards = [future.result() for future in futures]
+
+    manifest = {
+        'format': 'quattropole-shards/1',
+        'generated': datetime.now().isoformat(),
+        'compressed': compress,
+        'total_features': sum(s['count'] for s in shards),
+        'shards': shards,
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def _intersects(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def select_shards(manifest, cities=None, types=None, bbox=None):
+    """Shards des Manifests, gefiltert nach Städten, Typen und/oder Bounding Box"""
+    return [s for s in manifest['shards']
+            if (not cities or s['city'] in cities)
+            and (not types or s['type'] in types)
+            and (not bbox or _intersects(s['bbox'], bbox))]
+
+
+def load_shards(shard_dir, cities=None, types=None, bbox=None, verify=True):
+    """
+    Lädt nur die passenden Shards eines Shard-Verzeichnisses und liefert ihre Features.
+    Mit verify=True wird jede Datei gegen den SHA-256 im Manifest geprüft.
+    """
+    with open(os.path.join(shard_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    features = []
+    for shard in select_shards(manifest, cities, types, bbox):
+        with open(os.path.join(shard_dir, shard['path']), 'rb') as f:
+            data = f.read()
+        if verify and hashlib.sha256(data).hexdigest() != shard['sha256']:
+            raise ValueError(f"Prüfsumme stimmt nicht: {shard['path']}")
+        features.extend(json.loads(data)['features'])
+    return features
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Zerlegt einen Transport-Export in Shards je Stadt und Typ')
+    parser.add_argument('export', help='GeoJSON-Export, z.B. data/quattropole/quattropole_all_*.geojson')
+    parser.add_argument('--output', '-o', default=None, help='Zielverzeichnis (default: <export>_shards)')
+    parser.add_argument('--workers', type=int, default=4, help='Anzahl Schreib-Threads (default: 4)')
+    parser.add_argument('--precision', type=int, default=None)
+    parser.add_argument('--minify', action='store_true')
+    parser.add_argument('--compress', action='store_true')
+
+    args = parser.parse_args()
+    with open(args.export, 'r', encoding='utf-8') as f:
+        features = json.load(f)['features']
+    output_dir = args.output or os.path.splitext(args.export)[0] + '_shards'
+    manifest = write_shards(features, output_dir, args.precision, args.minify, args.compress, args.workers)
+    print(f"✓ {len(manifest['shards'])} Shards mit {manifest['total_features']} Features in {output_dir}")
+
+if __name__ == "__main__":
+    main()
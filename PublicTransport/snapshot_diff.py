@@ -0,0 +1,156 @@
+import argparse
+import csv
+import json
+import math
+import os
+import time
+
+# GeoJSON-Properties, die keine Tags sind
+BASE_PROPERTIES = {'name', 'type', 'city', 'country', 'source', 'osm_id'}
+
+
+def haversine_m(lon1, lat1, lon2, lat2):
+    """Entfernung zweier WGS84-Punkte in Metern"""
+    lon1, lat1, lon2, lat2 = map(math.radians, (lon1, lat1, lon2, lat2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371008.8 * math.asin(math.sqrt(a))
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_csv_features(path):
+    """
+    Liest einen CSV-Export zeilenweise als (Schlüssel, Name, Typ, Stadt, lon, lat, Tags).
+    Schlüssel ist OSM-ID und Typ; ältere Exporte ohne OSM-ID-Spalte werden über Typ, Stadt,
+    Name und das n-te Vorkommen dieser Kombination zugeordnet (Overpass liefert nach ID sortiert).
+    """
+    occurrences = {}
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f, delimiter=';')
+        for row in reader:
+            osm_id = row.get('OSM-ID')
+            if osm_id:
+                key = f"{osm_id}|{row['Typ']}"
+            else:
+                name_key = (row['Typ'], row['Stadt'], row['Name'])
+                occurrences[name_key] = occurrences.get(name_key, 0) + 1
+                key = f"{row['Typ']}|{row['Stadt']}|{row['Name']}|{occurrences[name_key]}"
+            tags = {'operator': row.get('Operator', ''), 'country': row.get('Land', '')}
+            for detail in (row.get('Details') or '').split('; '):
+                if ': ' in detail:
+                    tag, value = detail.split(': ', 1)
+                    tags[tag] = value
+            tags = {tag: value for tag, value in tags.items() if value}
+            yield key, row['Name'], row['Typ'], row['Stadt'], _float(row['Längengrad']), _float(row['Breitengrad']), tags
+
+
+def iter_geojson_features(path):
+    """Liest einen GeoJSON-Export als (Schlüssel, Name, Typ, Stadt, lon, lat, Tags), Schlüssel ist OSM-ID und Typ"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for feature in data.get('features', []):
+        props = feature.get('properties') or {}
+        coords = (feature.get('geometry') or {}).get('coordinates') or [None, None]
+        tags = {k: v for k, v in props.items() if k not in BASE_PROPERTIES and v not in ('', None)}
+        tags['country'] = props.get('country', '')
+        yield (f"{props.get('osm_id')}|{props.get('type', '')}", props.get('name', ''), props.get('type', ''), props.get('city', ''),
+               coords[0], coords[1], tags)
+
+
+def iter_features(path):
+    if path.endswith('.geojson') or path.endswith('.json'):
+        return iter_geojson_features(path)
+    return iter_csv_features(path)
+
+
+def diff_snapshots(old_path, new_path, move_threshold_m=5.0):
+    """
+    Vergleicht zwei Exporte per Hash-Join über den Schlüssel (OSM-ID und Typ, da ein OSM-Objekt
+    unter mehreren Typen exportiert werden kann, z.B. E-Auto und E-Bike Ladestation): der alte Snapshot
+    wird in ein Dictionary geladen, der neue zeilenweise dagegen geprüft. Features werden als
+    hinzugefügt, entfernt, verschoben (> move_threshold_m Meter) und/oder Tags geändert erkannt.
+    """
+    old = {}
+    for key, name, typ, city, lon, lat, tags in iter_features(old_path):
+        old[key] = (name, typ, city, lon, lat, tags)
+
+    delta = {'added': [], 'removed': [], 'moved': [], 'changed': []}
+    unchanged = 0
+    for key, name, typ, city, lon, lat, tags in iter_features(new_path):
+        previous = old.pop(key, None)
+        if previous is None:
+            delta['added'].append({'key': key, 'name': name, 'type': typ, 'city': city,
+                                   'coordinates': [lon, lat], 'tags': tags})
+            continue
+
+        old_name, old_typ, old_city, old_lon, old_lat, old_tags = previous
+        is_modified = False
+        if None not in (lon, lat, old_lon, old_lat):
+            distance = haversine_m(old_lon, old_lat, lon, lat)
+            if distance > move_threshold_m:
+                delta['moved'].append({'key': key, 'name': name, 'type': typ, 'from': [old_lon, old_lat],
+                                       'to': [lon, lat], 'distance_m': round(distance, 1)})
+                is_modified = True
+
+        old_values = dict(old_tags, name=old_name, type=old_typ)
+        new_values = dict(tags, name=name, type=typ)
+        if old_values != new_values:
+            changes = {tag: [old_values.get(tag), new_values.get(tag)]
+                       for tag in old_values.keys() | new_values.keys()
+                       if old_values.get(tag) != new_values.get(tag)}
+            delta['changed'].append({'key': key, 'name': name, 'type': typ, 'tags': changes})
+            is_modified = True
+
+        if not is_modified:
+            unchanged += 1
+
+    for key, (name, typ, city, lon, lat, tags) in old.items():
+        delta['removed'].append({'key': key, 'name': name, 'type': typ, 'city': city, 'coordinates': [lon, lat]})
+
+    delta['stats'] = {
+        'added': len(delta['added']),
+        'removed': len(delta['removed']),
+        'moved': len(delta['moved']),
+        'changed': len(delta['changed']),
+        'unchanged': unchanged,
+        'move_threshold_m': move_threshold_m,
+    }
+    return delta
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vergleicht zwei Quattropole Transport-Exporte (CSV oder GeoJSON)')
+    parser.add_argument('old', help='Älterer Snapshot')
+    parser.add_argument('new', help='Neuerer Snapshot')
+    parser.add_argument('--threshold', '-t', type=float, default=5.0,
+                        help='Ab dieser Entfernung in Metern gilt ein Feature als verschoben (default: 5)')
+    parser.add_argument('--output', '-o', default=None,
+                        help='Delta-Datei (default: <neuer Snapshot>.diff.json)')
+
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    delta = diff_snapshots(args.old, args.new, args.threshold)
+    elapsed = time.perf_counter() - start
+
+    delta = {'old': os.path.basename(args.old), 'new': os.path.basename(args.new), **delta}
+    output = args.output or os.path.splitext(args.new)[0] + '.diff.json'
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(delta, f, ensure_ascii=False, separators=(',', ':'))
+
+    stats = delta['stats']
+    print(f"Vergleich {delta['old']} -> {delta['new']} ({elapsed * 1000:.0f} ms)")
+    print(f"  Hinzugefügt: {stats['added']}")
+    print(f"  Entfernt: {stats['removed']}")
+    print(f"  Verschoben (> {args.threshold:g} m): {stats['moved']}")
+    print(f"  Tags geändert: {stats['changed']}")
+    print(f"  Unverändert: {stats['unchanged']}")
+    print(f"✓ Delta gespeichert: {output}")
+
+if __name__ == "__main__":
+    main()
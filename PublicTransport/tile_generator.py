@@ -0,0 +1,150 @@
+import argparse
+import json
+import math
+import os
+import re
+import shutil
+import time
+from datetime import datetime
+
+from export_utils import compressed_suffixes, write_compressed_copies
+from transport_data import latest_export, load_snapshot
+
+TILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'tiles')
+TILE_SIZE = 256
+MAX_LATITUDE = 85.05112878
+
+
+def layer_slug(feature_type):
+    """Dateisystem-tauglicher Layer-Name, z.B. 'E-Auto Ladestation' -> 'e-auto-ladestation'"""
+    slug = feature_type.lower().replace('ä', 'ae').replace('ö', 'oe').replace('ü', 'ue').replace('ß', 'ss')
+    return re.sub(r'[^a-z0-9]+', '-', slug).strip('-')
+
+
+def mercator(lon, lat):
+    """WGS84 -> Web Mercator, normiert auf [0, 1) (x nach Osten, y nach Süden)"""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = (lon + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return x, y
+
+
+def coordinate_decimals(z):
+    """Nachkommastellen, die bei Zoomstufe z noch ein Pixel auflösen (z10: 3, z16: 5)"""
+    pixel_degrees = 360.0 / (TILE_SIZE * 2 ** z)
+    return max(0, math.ceil(-math.log10(pixel_degrees)))
+
+
+def _write_tile(path, data, compress):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    size_gz = 0
+    if compress:
+        write_compressed_copies(path)
+        size_gz = os.path.getsize(path + '.gz')
+    return len(data), size_gz
+
+
+def generate_tiles(export_path=None, output_dir=TILES_DIR, min_zoom=10, max_zoom=16, types=None, compress=True):
+    """
+    Zerlegt einen Export in minifizierte GeoJSON-Kacheln <layer>/<z>/<x>/<y>.geojson (ein Layer
+    pro Typ) und schreibt daneben vorkomprimierte .gz-/.br-Dateien sowie eine manifest.json.
+    Koordinaten werden je Zoomstufe nur auf Pixelgenauigkeit gerundet.
+    """
+    snapshot = load_snapshot(export_path)
+    print(f"Erzeuge Kacheln z{min_zoom}-z{max_zoom} aus {snapshot.path}...")
+    start = time.perf_counter()
+
+    # Web-Mercator-Projektion einmal pro Feature, Kachel je Zoomstufe per Multiplikation
+    buckets = {}
+    layer_features = {}
+    layer_bounds = {}
+    for i in range(len(snapshot)):
+        lon, lat = snapshot.lon[i], snapshot.lat[i]
+        if math.isnan(lon) or math.isnan(lat):
+            continue
+        feature_type = snapshot.type_of(i)
+        if types and feature_type not in types:
+            continue
+        layer = layer_slug(feature_type)
+        layer_features[layer] = feature_type
+        bounds = layer_bounds.setdefault(layer, [lon, lat, lon, lat])
+        bounds[0], bounds[1] = min(bounds[0], lon), min(bounds[1], lat)
+        bounds[2], bounds[3] = max(bounds[2], lon), max(bounds[3], lat)
+
+        mx, my = mercator(lon, lat)
+        for z in range(min_zoom, max_zoom + 1):
+            n = 2 ** z
+            key = (layer, z, min(int(mx * n), n - 1), min(int(my * n), n - 1))
+            buckets.setdefault(key, []).append(i)
+
+    # Nur einen früheren Kachelsatz ersetzen, nie ein beliebiges Verzeichnis
+    if os.path.exists(os.path.join(output_dir, 'manifest.json')):
+        shutil.rmtree(output_dir)
+    elif os.path.isdir(output_dir) and os.listdir(output_dir):
+        raise FileExistsError(f"{output_dir} ist nicht leer und enthält keine manifest.json")
+
+    layers = {layer: {'type': feature_type, 'features': 0, 'bounds': [round(v, 6) for v in layer_bounds[layer]],
+                      'tiles': {}} for layer, feature_type in sorted(layer_features.items())}
+    total_bytes = total_gz = 0
+    for (layer, z, x, y), indices in sorted(buckets.items()):
+        decimals = coordinate_decimals(z)
+        features = []
+        for i in indices:
+            properties = {'name': snapshot.name[i], 'city': snapshot.city_of(i)}
+            for tag, values in snapshot.tags.items():
+                if values[i]:
+                    properties[tag] = values[i]
+            if snapshot.osm_id[i]:
+                properties['osm_id'] = snapshot.osm_id[i]
+            features.append({'type': 'Feature', 'properties': properties,
+                             'geometry': {'type': 'Point', 'coordinates': [round(snapshot.lon[i], decimals),
+                                                                           round(snapshot.lat[i], decimals)]}})
+        data = json.dumps({'type': 'FeatureCollection', 'features': features},
+                          ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        size, size_gz = _write_tile(os.path.join(output_dir, layer, str(z), str(x), f'{y}.geojson'), data, compress)
+        total_bytes += size
+        total_gz += size_gz
+        layers[layer]['tiles'][str(z)] = layers[layer]['tiles'].get(str(z), 0) + 1
+        if z == min_zoom:
+            layers[layer]['features'] += len(indices)
+
+    manifest = {
+        'format': 'geojson',
+        'tile_url': '{layer}/{z}/{x}/{y}.geojson',
+        'compressed': compressed_suffixes() if compress else [],
+        'source': os.path.basename(snapshot.path),
+        'generated': datetime.now().isoformat(),
+        'min_zoom': min_zoom,
+        'max_zoom': max_zoom,
+        'layers': layers,
+        'total_tiles': len(buckets),
+        'total_bytes': total_bytes,
+        'total_bytes_gz': total_gz,
+    }
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    print(f"  ✓ {len(buckets)} Kacheln in {len(layers)} Layern ({time.perf_counter() - start:.1f} s)")
+    print(f"  Größe: {total_bytes / 1024:.0f} KB" + (f", gzip: {total_gz / 1024:.0f} KB" if compress else ""))
+    print(f"  Pfad: {output_dir}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Erzeugt GeoJSON-Kacheln (z/x/y) je Transport-Typ')
+    parser.add_argument('export', nargs='?', default=None, help='Transport-Export (default: neuester GeoJSON-Export)')
+    parser.add_argument('--output', '-o', default=TILES_DIR)
+    parser.add_argument('--min-zoom', type=int, default=10)
+    parser.add_argument('--max-zoom', type=int, default=16)
+    parser.add_argument('--types', nargs='+', default=None, help='Nur diese Typen, z.B. Bushaltestelle Bahnhof')
+    parser.add_argument('--no-compress', action='store_true', help='Keine .gz-/.br-Dateien schreiben')
+
+    args = parser.parse_args()
+    generate_tiles(args.export or latest_export(), args.output, args.min_zoom, args.max_zoom, args.types,
+                   compress=not args.no_compress)
+
+if __name__ == "__main__":
+    main()
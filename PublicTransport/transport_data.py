@@ -0,0 +1,283 @@
+import csv
+import glob
+import hashlib
+import json
+import os
+import pickle
+import time
+from array import array
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'quattropole')
+CACHE_SUFFIX = '.cache'
+CACHE_VERSION = 1
+# GeoJSON-Properties mit eigener Spalte
+BASE_PROPERTIES = {'name', 'type', 'city', 'country', 'source', 'operator', 'osm_id'}
+
+
+def latest_export(pattern='*.geojson', data_dir=DATA_DIR):
+    """Pfad des neuesten Exports (nach Änderungszeit), z.B. latest_export('*_all_*.csv')"""
+    files = glob.glob(os.path.join(data_dir, pattern))
+    return max(files, key=os.path.getmtime) if files else None
+
+
+def _file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _ColumnBuilder:
+    """Sammelt Features direkt in Spalten; Typ und Stadt werden als Codes gespeichert."""
+
+    def __init__(self):
+        self.osm_id = array('q')
+        self.lon = array('d')
+        self.lat = array('d')
+        self.type_code = array('H')
+        self.city_code = array('H')
+        self.types = []
+        self.cities = []
+        self.name = []
+        self.country = []
+        self.operator = []
+        self.tags = {}
+        self._type_codes = {}
+        self._city_codes = {}
+
+    @staticmethod
+    def _code(codes, values, value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    def add(self, osm_id, lon, lat, name, feature_type, city, country, operator, tags):
+        index = len(self.name)
+        self.osm_id.append(osm_id or 0)
+        self.lon.append(lon if lon is not None else float('nan'))
+        self.lat.append(lat if lat is not None else float('nan'))
+        self.type_code.append(self._code(self._type_codes, self.types, feature_type))
+        self.city_code.append(self._code(self._city_codes, self.cities, city))
+        self.name.append(name)
+        self.country.append(country)
+        self.operator.append(operator)
+        for tag, value in tags.items():
+            column = self.tags.get(tag)
+            if column is None:
+                column = self.tags[tag] = [''] * index
+            column.append(str(value))
+        for column in self.tags.values():
+            if len(column) == index:
+                column.append('')
+
+    def columns(self):
+        return {
+            'osm_id': self.osm_id, 'lon': self.lon, 'lat': self.lat,
+            'type_code': self.type_code, 'city_code': self.city_code,
+            'types': self.types, 'cities': self.cities,
+            'name': self.name, 'country': self.country, 'operator': self.operator,
+            'tags': self.tags,
+        }
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_csv(path):
+    """Liest einen CSV-Export (Semikolon) in Spalten; 'Details' wird in Tag-Spalten aufgeteilt"""
+    builder = _ColumnBuilder()
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f, delimiter=';'):
+            tags = {}
+            for detail in (row.get('Details') or '').split('; '):
+                if ': ' in detail:
+                    tag, value = detail.split(': ', 1)
+                    tags[tag] = value
+            osm_id = row.get('OSM-ID')
+            builder.add(int(osm_id) if osm_id else 0, _float(row.get('Längengrad')), _float(row.get('Breitengrad')),
+                        row.get('Name', ''), row.get('Typ', ''), row.get('Stadt', ''), row.get('Land', ''),
+                        row.get('Operator', ''), tags)
+    return builder.columns()
+
+
+def parse_geojson(path):
+    """Liest einen GeoJSON-Export in Spalten; weitere Properties werden Tag-Spalten"""
+    builder = _ColumnBuilder()
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for feature in data.get('features', []):
+        props = feature.get('properties') or {}
+        coords = (feature.get('geometry') or {}).get('coordinates') or [None, None]
+        tags = {k: v for k, v in props.items() if k not in BASE_PROPERTIES and v not in ('', None)}
+        builder.add(props.get('osm_id'), coords[0], coords[1], props.get('name', ''), props.get('type', ''),
+                    props.get('city', ''), props.get('country', ''), props.get('operator', ''), tags)
+    return builder.columns()
+
+
+class TransportSnapshot:
+    """
+    Spaltenorientierte, lazy geladene Sicht auf einen Transport-Export (CSV oder GeoJSON).
+
+    Die Datei wird erst beim ersten Zugriff gelesen. Das Ergebnis wird als Binärdatei
+    <export>.cache daneben gespeichert und beim nächsten Laden wiederverwendet, solange
+    Größe und Änderungszeit (oder, falls nur die Zeit abweicht, der SHA-1) der Quelle passen.
+    Koordinaten und OSM-IDs liegen in typisierten Arrays, Typ und Stadt als Codes, so dass
+    select() ohne ein einziges Dictionary pro Feature filtern kann.
+
+    Beispiel:
+        snapshot = TransportSnapshot(latest_export('*_all_*.csv'))
+        for i in snapshot.select(city='Metz', feature_type='Bushaltestelle'):
+            print(snapshot.name[i], snapshot.lon[i], snapshot.lat[i])
+    """
+
+    def __init__(self, path, use_cache=True):
+        self.path = path
+        self.use_cache = use_cache
+        self._columns = None
+        self.load_seconds = None
+        self.from_cache = False
+
+    def _source_key(self):
+        stat = os.stat(self.path)
+        return {'version': CACHE_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def _read_cache(self, key):
+        cache_path = self.path + CACHE_SUFFIX
+        if not os.path.exists(cache_path):
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                cached_key = pickle.load(f)
+                if cached_key.get('version') != key['version'] or cached_key.get('size') != key['size']:
+                    return None
+                if cached_key.get('mtime_ns') == key['mtime_ns']:
+                    return pickle.load(f)
+                sha1 = _file_sha1(self.path)
+                if cached_key.get('sha1') != sha1:
+                    return None
+                columns = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        # Gleicher Inhalt mit neuer mtime: Schlüssel aktualisieren, damit nicht jedes Mal gehasht wird
+        self._write_cache(key, columns, sha1)
+        return columns
+
+    def _write_cache(self, key, columns, sha1=None):
+        cache_path = self.path + CACHE_SUFFIX
+        tmp_path = cache_path + '.tmp'
+        key = dict(key, sha1=sha1 or _file_sha1(self.path))
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(columns, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Cache konnte nicht geschrieben werden: {e}")
+
+    def _load(self):
+        if self._columns is not None:
+            return self._columns
+        start = time.perf_counter()
+        key = self._source_key()
+        columns = self._read_cache(key) if self.use_cache else None
+        self.from_cache = columns is not None
+        if columns is None:
+            parse = parse_geojson if self.path.endswith(('.geojson', '.json')) else parse_csv
+            columns = parse(self.path)
+            if self.use_cache:
+                self._write_cache(key, columns)
+        self._columns = columns
+        self.load_seconds = time.perf_counter() - start
+        return columns
+
+    def __len__(self):
+        return len(self._load()['name'])
+
+    def __getattr__(self, column):
+        # Spalten (osm_id, lon, lat, name, country, operator, types, cities, ...) erst bei Zugriff laden
+        if column.startswith('_'):
+            raise AttributeError(column)
+        columns = self._load()
+        if column in columns:
+            return columns[column]
+        raise AttributeError(column)
+
+    def tag(self, tag):
+        """Spalte eines Tags (z.B. 'wheelchair'), '' wo nicht gesetzt"""
+        columns = self._load()
+        return columns['tags'].get(tag) or [''] * len(columns['name'])
+
+    def type_of(self, index):
+        return self.types[self.type_code[index]]
+
+    def city_of(self, index):
+        return self.cities[self.city_code[index]]
+
+    def select(self, city=None, feature_type=None, bbox=None):
+        """
+        Indizes aller Features, die zu Stadt, Typ und Bounding Box (min_lon, min_lat, max_lon, max_lat)
+        passen, als array('I').
+        """
+        columns = self._load()
+        city_code = columns['cities'].index(city) if city in columns['cities'] else None
+        type_code = columns['types'].index(feature_type) if feature_type in columns['types'] else None
+        if (city is not None and city_code is None) or (feature_type is not None and type_code is None):
+            return array('I')
+
+        indices = range(len(columns['name']))
+        if city_code is not None:
+            codes = columns['city_code']
+            indices = [i for i in indices if codes[i] == city_code]
+        if type_code is not None:
+            codes = columns['type_code']
+            indices = [i for i in indices if codes[i] == type_code]
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            lon, lat = columns['lon'], columns['lat']
+            indices = [i for i in indices if min_lon <= lon[i] <= max_lon and min_lat <= lat[i] <= max_lat]
+        return array('I', indices)
+
+    def feature(self, index):
+        """Ein einzelnes Feature als GeoJSON-Dictionary"""
+        columns = self._load()
+        properties = {
+            'name': columns['name'][index],
+            'type': self.type_of(index),
+            'city': self.city_of(index),
+            'country': columns['country'][index],
+            'operator': columns['operator'][index],
+        }
+        for tag, values in columns['tags'].items():
+            if values[index]:
+                properties[tag] = values[index]
+        if columns['osm_id'][index]:
+            properties['osm_id'] = columns['osm_id'][index]
+        return {
+            'type': 'Feature',
+            'properties': properties,
+            'geometry': {'type': 'Point', 'coordinates': [columns['lon'][index], columns['lat'][index]]},
+        }
+
+    def counts(self):
+        """Anzahl Features je (Stadt, Typ)"""
+        columns = self._load()
+        counts = {}
+        for city_code, type_code in zip(columns['city_code'], columns['type_code']):
+            key = (columns['cities'][city_code], columns['types'][type_code])
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+
+def load_snapshot(path=None, use_cache=True):
+    """Lazy geladener Snapshot; ohne Pfad der neueste GeoJSON-Export"""
+    path = path or latest_export()
+    if not path:
+        raise FileNotFoundError(f"Kein Export in {DATA_DIR} gefunden")
+    return TransportSnapshot(path, use_cache=use_cache)
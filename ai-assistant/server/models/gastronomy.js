@@ -23,6 +23,10 @@ const gastronomySchema = new mongoose.Schema({
     required: true,
     trim: true,
   },
+  recordId: { // Position in the export stream, referenced by the category index
+    type: Number,
+    index: true,
+  },
   categories: {
     type: [String],
     default: [],
@@ -19,6 +19,10 @@ const shopSchema = new mongoose.Schema({
     required: true,
     trim: true,
   },
+  recordId: { // Position in the export stream, referenced by the category index
+    type: Number,
+    index: true,
+  },
   categories: { // Changed from 'category' to 'categories' for consistency
     type: [String],
     default: [],
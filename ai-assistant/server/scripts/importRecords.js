@@ -0,0 +1,77 @@
+import mongoose from 'mongoose';
+import fs from 'fs';
+import path from 'path';
+import readline from 'readline';
+import Shop from '../models/shop.js';
+import Gastronomy from '../models/gastronomy.js';
+
+// Configuration
+const MONGODB_URI = process.env.MONGODB_URI || 'mongodb://localhost:27017/ai_assistant_chat';
+// NDJSON produced by scraper/export_records.py (one typed record per line)
+const NDJSON_FILE_PATH = process.argv[2] || path.join(path.dirname(new URL(import.meta.url).pathname), 'saarbruecken_records.ndjson');
+const BATCH_SIZE = 500;
+
+const MODELS = { shop: Shop, gastronomy: Gastronomy };
+
+async function flush(batches, counts) {
+  for (const [kind, docs] of Object.entries(batches)) {
+    if (docs.length === 0) continue;
+    try {
+      const inserted = await MODELS[kind].insertMany(docs, { ordered: false });
+      counts.imported += inserted.length;
+    } catch (bulkError) {
+      // With ordered: false valid documents are still inserted
+      const inserted = bulkError.insertedDocs?.length ?? 0;
+      counts.imported += inserted;
+      counts.skipped += docs.length - inserted;
+      console.error(`Bulk insert of ${kind} records partially failed:`, bulkError.message);
+    }
+    batches[kind] = [];
+  }
+}
+
+async function importRecords() {
+  const counts = { imported: 0, skipped: 0 };
+  try {
+    await mongoose.connect(MONGODB_URI);
+    console.log('MongoDB connected for NDJSON import...');
+
+    const lines = readline.createInterface({
+      input: fs.createReadStream(NDJSON_FILE_PATH, { encoding: 'utf-8' }),
+      crlfDelay: Infinity,
+    });
+
+    const batches = { shop: [], gastronomy: [] };
+    let pending = 0;
+
+    for await (const line of lines) {
+      if (!line) continue;
+      const { kind, id, imagePaths, ...doc } = JSON.parse(line);
+      if (!MODELS[kind] || !doc.location) {
+        // Both models require a location, records without coordinates cannot be stored
+        counts.skipped++;
+        continue;
+      }
+      batches[kind].push({ ...doc, recordId: id });
+      if (++pending >= BATCH_SIZE) {
+        await flush(batches, counts);
+        pending = 0;
+      }
+    }
+    await flush(batches, counts);
+
+    console.log('----------------------------------------');
+    console.log('NDJSON import process completed.');
+    console.log(`Successfully imported ${counts.imported} records.`);
+    console.log(`Skipped ${counts.skipped} records (missing location or errors).`);
+    console.log('----------------------------------------');
+  } catch (error) {
+    console.error('Error during the import process:', error);
+  } finally {
+    await mongoose.disconnect();
+    console.log('MongoDB disconnected.');
+  }
+}
+
+// Run the import function
+importRecords();
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+from datetime import datetime
+
+import scrapy
+
+logger = logging.getLogger(__name__)
+
+
+def _text(value):
+    """Flattens schema.org values (strings, lists, nested objects) into plain text."""
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ', '.join(filter(None, (_text(v) for v in value)))
+    if isinstance(value, dict):
+        return _text(value.get('name') or value.get('url') or value.get('@id'))
+    return str(value).strip()
+
+
+def _parse_iso(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def format_datum(start, end):
+    """Formats start/end like the Saarbrücken site, e.g. "25.05.2025 - 10:00 Uhr bis 25.05.2025 - 18:00 Uhr"."""
+    def fmt(value):
+        if value.hour or value.minute:
+            return value.strftime('%d.%m.%Y - %H:%M Uhr')
+        return value.strftime('%d.%m.%Y')
+    if not start:
+        return ''
+    if not end or end == start:
+        return fmt(start)
+    return f"{fmt(start)} bis {fmt(end)}"
+
+
+def _place_text(location):
+    """Venue name and address lines of a schema.org Place, newline separated like 'Ort'."""
+    if isinstance(location, list):
+        location = location[0] if location else {}
+    if not isinstance(location, dict):
+        return _text(location)
+    lines = [_text(location.get('name'))]
+    address = location.get('address')
+    if isinstance(address, dict):
+        lines.append(_text(address.get('streetAddress')))
+        lines.append(' '.join(filter(None, (_text(address.get('postalCode')), _text(address.get('addressLocality'))))))
+    else:
+        lines.append(_text(address))
+    return '\n'.join(line for line in lines if line)
+
+
+def iter_jsonld_events(data):
+    """Yields every schema.org *Event object in a JSON-LD document (plain, list or @graph)."""
+    if isinstance(data, list):
+        for entry in data:
+            yield from iter_jsonld_events(entry)
+    elif isinstance(data, dict):
+        types = data.get('@type', '')
+        types = types if isinstance(types, list) else [types]
+        if any(str(t).endswith('Event') for t in types):
+            yield data
+        for key in ('@graph', 'itemListElement', 'item'):
+            if key in data:
+                yield from iter_jsonld_events(data[key])
+
+
+class JsonLdEventSpider(scrapy.Spider):
+    """
+    Generic event spider for city portals that publish schema.org Event markup as JSON-LD.
+
+    Events are mapped to the Saarbrücken item schema (see event_export.EVENT_FIELDS), so all
+    cities end up in one output format. Pagination follows rel="next" links; event pages
+    linked from a listing are followed when the listing itself carries no JSON-LD.
+    """
+    name = 'city_events'
+    custom_settings = {
+        'ITEM_PIPELINES': {'event_export.EventExportPipeline': 300},
+    }
+
+    def __init__(self, city=None, start_urls=None, output_basename=None, event_link_css=None,
+                 max_pages=200, *args, **kwargs):
+        super(JsonLdEventSpider, self).__init__(*args, **kwargs)
+        self.city = city or ''
+        self.start_urls = list(start_urls or [])
+        self.event_link_css = event_link_css
+        self.max_pages = int(max_pages)
+        self.pages = 0
+        self.event_count = 0
+        self.output_basename = output_basename or f"{self.city.lower()}_events_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    def parse(self, response):
+        self.pages += 1
+        events = list(self.extract_events(response))
+        for event in events:
+            self.event_count += 1
+            yield event
+
+        if not events and self.event_link_css:
+            for href in response.css(self.event_link_css).getall():
+                yield response.follow(href, callback=self.parse_event_page, priority=1)
+
+        next_page = response.css('link[rel="next"]::attr(href), a[rel="next"]::attr(href)').get()
+        if next_page and self.pages < self.max_pages:
+            yield response.follow(next_page, callback=self.parse)
+
+    def parse_event_page(self, response):
+        for event in self.extract_events(response):
+            self.event_count += 1
+            yield event
+
+    def extract_events(self, response):
+        for script in response.css('script[type="application/ld+json"]::text').getall():
+            try:
+                data = json.loads(script)
+            except json.JSONDecodeError:
+                continue
+            for raw in iter_jsonld_events(data):
+                event = self.to_item(raw, response)
+                if event.get('Name'):
+                    yield event
+
+    def to_item(self, raw, response):
+        start = _parse_iso(raw.get('startDate'))
+        end = _parse_iso(raw.get('endDate'))
+        event_type = raw.get('@type', '')
+        event_type = event_type[0] if isinstance(event_type, list) else event_type
+        location = raw.get('location') or {}
+        image = raw.get('image')
+        if isinstance(image, list):
+            image = image[0] if image else ''
+        if isinstance(image, dict):
+            image = image.get('url', '')
+        offers = raw.get('offers') or {}
+        if isinstance(offers, list):
+            offers = offers[0] if offers else {}
+        price = ''
+        if isinstance(offers, dict) and offers.get('price') not in (None, ''):
+            price = f"{offers.get('price')} {offers.get('priceCurrency', '')}".strip()
+        return {
+            'Name': _text(raw.get('name')),
+            'Art': event_type if event_type != 'Event' else '',
+            'Ort': _place_text(location),
+            'Datum': format_datum(start, end),
+            'Beginn': start.isoformat(timespec='minutes') if start else '',
+            'Ende': (end or start).isoformat(timespec='minutes') if start else '',
+            'Telefon': _text(location.get('telephone')) if isinstance(location, dict) else '',
+            'Website': response.urljoin(_text(raw.get('url'))) if raw.get('url') else response.url,
+            'Detailseite': response.url,
+            'Bild': response.urljoin(_text(image)) if image else '',
+            'Beschreibung': _text(raw.get('description')),
+            'Ticketvorverkauf': price,
+            'Stadt': self.city,
+        }
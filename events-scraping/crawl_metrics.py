@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import math
+import os
+import queue
+import time
+
+# Pass as `extra=SAMPLED` for per-item debug lines that only need to be logged 1 in N times
+SAMPLED = {'sampled': True}
+
+_listeners = {}
+
+
+class SamplingFilter(logging.Filter):
+    """Lets every record through, except records marked SAMPLED, of which only 1 in `rate` pass."""
+
+    def __init__(self, rate=50):
+        super(SamplingFilter, self).__init__()
+        self.rate = max(1, int(rate))
+        self._counter = itertools.count()
+
+    def filter(self, record):
+        if not getattr(record, 'sampled', False):
+            return True
+        return next(self._counter) % self.rate == 0
+
+
+def get_parser_logger(name, log_file='parser_debug.log', level=logging.INFO, sample_rate=50):
+    """
+    Returns the parser debug logger of a spider.
+
+    Records are handed to a QueueHandler and written by a background QueueListener thread,
+    so the reactor thread never blocks on file I/O. The logger and its file handler are created
+    once per name and reused by later spider instances.
+    """
+    parser_logger = logging.getLogger(name)
+    if name not in _listeners:
+        file_handler = logging.FileHandler(log_file, mode='w', encoding='utf-8')
+        file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        _listeners[name] = listener
+
+        parser_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        parser_logger.addFilter(SamplingFilter(sample_rate))
+        parser_logger.propagate = False
+    parser_logger.setLevel(level)
+    return parser_logger
+
+
+def stop_parser_logger(name):
+    """Flushes and stops the background writer of a parser logger."""
+    listener = _listeners.pop(name, None)
+    if listener:
+        atexit.unregister(listener.stop)
+        listener.stop()
+        logger = logging.getLogger(name)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        for log_filter in list(logger.filters):
+            logger.removeFilter(log_filter)
+        for handler in listener.handlers:
+            handler.close()
+
+
+class Histogram:
+    """Streaming histogram with power-of-two buckets; O(1) memory regardless of sample count."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = {}
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        bucket = math.ceil(math.log2(value)) if value > 0 else -64
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket containing the q-quantile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2.0 ** bucket, self.max)
+        return self.max
+
+    def summary(self):
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 6),
+            'min': round(self.min, 6),
+            'p50': round(self.quantile(0.5), 6),
+            'p95': round(self.quantile(0.95), 6),
+            'max': round(self.max, 6),
+        }
+
+
+class CrawlMetrics:
+    """Counters and histograms of one crawl, reported as JSON when the spider closes."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, value):
+        if value is None:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(value)
+
+    def report(self, **extra):
+        elapsed = time.monotonic() - self.started
+        rates = {}
+        for name in ('list_pages', 'detail_pages', 'items_emitted'):
+            rates[f"{name}_per_second"] = round(self.counters.get(name, 0) / elapsed, 3) if elapsed else 0
+        report = {
+            'elapsed_seconds': round(elapsed, 3),
+            'counters': dict(sorted(self.counters.items())),
+            'rates': rates,
+            'histograms_seconds': {name: h.summary() for name, h in sorted(self.histograms.items())},
+        }
+        report.update(extra)
+        return report
+
+    def write_report(self, path, **extra):
+        report = self.report(**extra)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
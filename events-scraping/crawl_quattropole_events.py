@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+from datetime import datetime
+
+from scrapy.crawler import CrawlerProcess
+
+from city_event_spiders import JsonLdEventSpider
+from scrape_saarbruecken_events_improved import CRAWL_PROFILES, SaarbrueckenEventSpider, build_settings
+
+SOURCES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'event_sources.json')
+SPIDERS = {
+    'saarbruecken': SaarbrueckenEventSpider,
+    'jsonld': JsonLdEventSpider,
+}
+
+
+def load_sources(path=SOURCES_FILE):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def crawl_cities(city_keys, settings, sources=None, run_name=None):
+    """
+    Runs the event spiders of several cities concurrently in one process and one reactor.
+
+    All crawls share the process-wide settings (profile, rps budget per domain, archive mode).
+    Every city writes its own partition scraped_data/<run_name>/<city>.jsonl, so one run
+    produces a single output directory partitioned by city.
+    """
+    sources = sources or load_sources()
+    run_name = run_name or f"quattropole_events_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    process = CrawlerProcess(settings)
+    for key in city_keys:
+        source = dict(sources[key])
+        spider_cls = SPIDERS[source.pop('spider')]
+        city = source.pop('city')
+        kwargs = {'output_basename': f"{run_name}/{key}"}
+        if spider_cls is JsonLdEventSpider:
+            kwargs['city'] = city
+        kwargs.update(source)
+        print(f"Scheduling {city} ({spider_cls.__name__})")
+        process.crawl(spider_cls, **kwargs)
+    process.start()
+    return run_name
+
+
+if __name__ == "__main__":
+    sources = load_sources()
+    parser = argparse.ArgumentParser(description='Crawl the events of all Quattropole cities in one process')
+    parser.add_argument('--cities', '-c', nargs='+', choices=sorted(sources) + ['all'], default=['all'])
+    parser.add_argument('--profile', choices=sorted(CRAWL_PROFILES), default='polite')
+    parser.add_argument('--rps', type=float, default=None, help='Requests per second budget per domain')
+    args = parser.parse_args()
+
+    city_keys = list(sources) if 'all' in args.cities else args.cities
+    run_name = crawl_cities(city_keys, build_settings(args.profile, args.rps), sources)
+    print(f"Events written to scraped_data/{run_name}/")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+
+
+def list_fingerprint(name, date_text, place):
+    """Fingerprint of an event as shown on the list page (name, date, place)."""
+    raw = '\x1f'.join((name or '', date_text or '', place or ''))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def content_hash(event_data):
+    """Stable hash of the parsed detail content of an event."""
+    raw = json.dumps(event_data, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+class CrawlStateStore:
+    """
+    Persistent record of detail pages that were already scraped.
+
+    Each detail URL is stored with the fingerprint of its list-page entry and the hash of the
+    parsed detail content. A detail page whose list fingerprint is unchanged does not have to be
+    fetched again; a fetched page whose content hash is unchanged is not emitted again. Every
+    processed event is committed immediately, so an interrupted crawl resumes where it stopped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS seen_events ('
+            ' url TEXT PRIMARY KEY,'
+            ' fingerprint TEXT NOT NULL,'
+            ' content_hash TEXT,'
+            ' first_seen TEXT NOT NULL,'
+            ' last_seen TEXT NOT NULL,'
+            ' last_changed TEXT'
+            ')'
+        )
+        self.conn.commit()
+        self.stats = {'skipped_unchanged_listing': 0, 'unchanged_content': 0, 'new': 0, 'modified': 0}
+
+    def is_unchanged(self, url, fingerprint):
+        """True if the detail page was scraped before and its list entry did not change."""
+        row = self.conn.execute(
+            'SELECT fingerprint, content_hash FROM seen_events WHERE url = ?', (url,)
+        ).fetchone()
+        if row and row[0] == fingerprint and row[1]:
+            self.conn.execute('UPDATE seen_events SET last_seen = ? WHERE url = ?',
+                              (datetime.now().isoformat(), url))
+            self.stats['skipped_unchanged_listing'] += 1
+            return True
+        return False
+
+    def content_changed(self, url, new_hash):
+        """True if the detail content of url is new or differs from the stored hash."""
+        row = self.conn.execute('SELECT content_hash FROM seen_events WHERE url = ?', (url,)).fetchone()
+        return row is None or row[0] != new_hash
+
+    def record(self, url, fingerprint, new_hash):
+        """
+        Stores the result of a scraped detail page.
+        Returns 'new', 'modified' or 'unchanged'.
+        """
+        now = datetime.now().isoformat()
+        row = self.conn.execute('SELECT content_hash FROM seen_events WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            status = 'new'
+            self.conn.execute(
+                'INSERT INTO seen_events (url, fingerprint, content_hash, first_seen, last_seen, last_changed)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (url, fingerprint, new_hash, now, now, now)
+            )
+        elif row[0] == new_hash:
+            status = 'unchanged'
+            self.conn.execute('UPDATE seen_events SET fingerprint = ?, last_seen = ? WHERE url = ?',
+                              (fingerprint, now, url))
+        else:
+            status = 'modified'
+            self.conn.execute(
+                'UPDATE seen_events SET fingerprint = ?, content_hash = ?, last_seen = ?, last_changed = ?'
+                ' WHERE url = ?',
+                (fingerprint, new_hash, now, now, url)
+            )
+        self.conn.commit()
+        self.stats['unchanged_content' if status == 'unchanged' else status] += 1
+        return status
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timedelta
+
+from event_index import parse_event_datetimes, read_events
+
+FORMAT = 'saarbruecken-events-compressed/1'
+# Fields that describe one occurrence; everything else is the shared event body
+OCCURRENCE_FIELDS = ('Datum', 'Beginn', 'Ende', 'Detailseite')
+
+# Shapes of the free-text Datum, see parse_event_datetimes
+DATUM_STYLES = {
+    'time': re.compile(r'^\d{2}\.\d{2}\.\d{4} - \d{2}:\d{2} Uhr$'),
+    'time_range': re.compile(r'^\d{2}\.\d{2}\.\d{4} - \d{2}:\d{2} Uhr bis \d{2}\.\d{2}\.\d{4} - \d{2}:\d{2} Uhr$'),
+    'day': re.compile(r'^\d{2}\.\d{2}\.\d{4}$'),
+    'day_range': re.compile(r'^\d{2}\.\d{2}\.\d{4} bis \d{2}\.\d{2}\.\d{4}$'),
+}
+
+
+def datum_style(datum):
+    for style, pattern in DATUM_STYLES.items():
+        if pattern.match(datum):
+            return style
+    return None
+
+
+def format_datum(start, end, style):
+    """Inverse of parse_event_datetimes for the regular Datum styles."""
+    if style == 'time':
+        return start.strftime('%d.%m.%Y - %H:%M Uhr')
+    if style == 'time_range':
+        return f"{start.strftime('%d.%m.%Y - %H:%M Uhr')} bis {end.strftime('%d.%m.%Y - %H:%M Uhr')}"
+    if style == 'day':
+        return start.strftime('%d.%m.%Y')
+    return f"{start.strftime('%d.%m.%Y')} bis {end.strftime('%d.%m.%Y')}"
+
+
+def content_key(body):
+    raw = json.dumps(body, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def find_rrule(datums):
+    """
+    Describes a sorted list of Datum strings as an RRULE if the occurrences share their style,
+    duration and a constant step of whole days. The rule is only returned if expanding it
+    reproduces every Datum exactly.
+    """
+    if len(datums) < 3:
+        return None
+    style = datum_style(datums[0])
+    if style is None or any(datum_style(d) != style for d in datums):
+        return None
+    spans = [parse_event_datetimes(d) for d in datums]
+    if any(start is None for start, _ in spans):
+        return None
+    step = spans[1][0] - spans[0][0]
+    duration = spans[0][1] - spans[0][0]
+    if step <= timedelta(0) or step % timedelta(days=1):
+        return None
+    rule = {
+        'rrule': (f"FREQ=WEEKLY;INTERVAL={step.days // 7}" if step.days % 7 == 0
+                  else f"FREQ=DAILY;INTERVAL={step.days}") + f";COUNT={len(datums)}",
+        'dtstart': spans[0][0].isoformat(timespec='minutes'),
+        'duration_minutes': int(duration.total_seconds() // 60),
+        'datum_style': style,
+    }
+    if expand_rrule(rule) != datums:
+        return None
+    return rule
+
+
+def expand_rrule(rule):
+    """Returns the Datum strings of an occurrence rule written by find_rrule."""
+    parts = dict(part.split('=', 1) for part in rule['rrule'].split(';'))
+    step = timedelta(days=int(parts['INTERVAL']) * (7 if parts['FREQ'] == 'WEEKLY' else 1))
+    start = datetime.fromisoformat(rule['dtstart'])
+    duration = timedelta(minutes=rule['duration_minutes'])
+    datums = []
+    for i in range(int(parts['COUNT'])):
+        occurrence = start + i * step
+        datums.append(format_datum(occurrence, occurrence + duration, rule['datum_style']))
+    return datums
+
+
+def sort_key(datum):
+    start, _ = parse_event_datetimes(datum)
+    return (start or datetime.max, datum)
+
+
+def compress_events(events):
+    """
+    Groups event occurrences by their content (all fields except the date) and stores every
+    body once, with either a compact RRULE or the list of its Datum strings. Each occurrence
+    has its own detail page, so the Detailseite URLs are kept as a list in the same order.
+    """
+    fields = list(events[0].keys()) if events else []
+    with_times = 'Beginn' in fields
+    groups = {}
+    for event in events:
+        body = {k: v for k, v in event.items() if k not in OCCURRENCE_FIELDS}
+        group = groups.setdefault(content_key(body), {'body': body, 'occurrences': []})
+        group['occurrences'].append((event.get('Datum', ''), event.get('Detailseite', '')))
+
+    compressed = []
+    for group in groups.values():
+        occurrences = sorted(group['occurrences'], key=lambda occurrence: sort_key(occurrence[0]))
+        datums = [datum for datum, _ in occurrences]
+        entry = {'body': group['body']}
+        if any(url for _, url in occurrences):
+            entry['detail_urls'] = [url for _, url in occurrences]
+        rule = find_rrule(datums)
+        if rule:
+            entry.update(rule)
+        else:
+            entry['occurrences'] = datums
+        compressed.append(entry)
+    return {'format': FORMAT, 'fields': fields, 'with_times': with_times,
+            'occurrences': len(events), 'events': compressed}
+
+
+def expand_events(compressed):
+    """Yields the original events (occurrences sorted by date within each body)."""
+    fields = compressed['fields']
+    for entry in compressed['events']:
+        datums = expand_rrule(entry) if 'rrule' in entry else entry['occurrences']
+        detail_urls = entry.get('detail_urls') or [''] * len(datums)
+        for datum, detail_url in zip(datums, detail_urls):
+            event = dict(entry['body'])
+            event['Datum'] = datum
+            event['Detailseite'] = detail_url
+            if compressed.get('with_times'):
+                start, end = parse_event_datetimes(datum)
+                event['Beginn'] = start.isoformat(timespec='minutes') if start else ''
+                event['Ende'] = end.isoformat(timespec='minutes') if end else ''
+            yield {field: event.get(field, '') for field in fields}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compress recurring events (one body per event, RRULE or date list)')
+    parser.add_argument('input', help='Events JSON/JSONL, or a compressed file with --expand')
+    parser.add_argument('--output', '-o', default=None)
+    parser.add_argument('--expand', action='store_true', help='Expand a compressed file back into events')
+    args = parser.parse_args()
+
+    if args.output and os.path.abspath(args.output) == os.path.abspath(args.input):
+        parser.error('--output must differ from the input file')
+
+    if args.expand:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            compressed = json.load(f)
+        base = (args.input[:-len('.compressed.json')] if args.input.endswith('.compressed.json')
+                else os.path.splitext(args.input)[0])
+        output = args.output or base + '.expanded.jsonl'
+        count = 0
+        with open(output, 'w', encoding='utf-8') as f:
+            for event in expand_events(compressed):
+                f.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n')
+                count += 1
+        print(f"Expanded {count} events into {output}")
+    else:
+        events = read_events(args.input)
+        compressed = compress_events(events)
+        output = args.output or os.path.splitext(args.input)[0] + '.compressed.json'
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(compressed, f, ensure_ascii=False, separators=(',', ':'))
+        rules = sum(1 for entry in compressed['events'] if 'rrule' in entry)
+        print(f"{len(events)} occurrences -> {len(compressed['events'])} event bodies ({rules} as RRULE), "
+              f"{os.path.getsize(args.input)} -> {os.path.getsize(output)} bytes: {output}")
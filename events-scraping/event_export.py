@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shared'))
+from profiling import profiled
+
+logger = logging.getLogger(__name__)
+
+# Common item schema of all city event spiders (the Saarbrücken fields plus the city)
+EVENT_FIELDS = [
+    'Name', 'Art', 'Ort', 'Datum', 'Beginn', 'Ende', 'Telefon', 'Website',
+    'Detailseite', 'Bild', 'Beschreibung', 'Ticketvorverkauf', 'Stadt',
+]
+
+
+def normalize_event(item, city=''):
+    """Returns the event in the common schema: all fields present, in order, strings only."""
+    event = dict(item)
+    if city and not event.get('Stadt'):
+        event['Stadt'] = city
+    return {field: event.get(field) or '' for field in EVENT_FIELDS}
+
+
+def finalize_jsonl(part_path, final_path, json_array_path=None):
+    """
+    Atomically publishes a finished JSON Lines stream and optionally converts it into a
+    compact JSON array. The array is written line by line, so memory stays constant.
+    Returns the number of items in the stream.
+    """
+    os.replace(part_path, final_path)
+    count = 0
+    if json_array_path:
+        tmp_path = json_array_path + '.part'
+        with open(final_path, 'r', encoding='utf-8') as src, open(tmp_path, 'w', encoding='utf-8') as dst:
+            dst.write('[')
+            for line in src:
+                line = line.strip()
+                if not line:
+                    continue
+                if count:
+                    dst.write(',')
+                dst.write(line)
+                count += 1
+            dst.write(']')
+        os.replace(tmp_path, json_array_path)
+    else:
+        with open(final_path, 'r', encoding='utf-8') as src:
+            count = sum(1 for line in src if line.strip())
+    return count
+
+
+def truncate_partial_line(part_path):
+    """Drops a last line that was cut off by a crash. Returns the number of complete lines."""
+    with open(part_path, 'rb') as f:
+        data = f.read()
+    complete = data[:data.rfind(b'\n') + 1]
+    if len(complete) != len(data):
+        with open(part_path, 'wb') as f:
+            f.write(complete)
+    return complete.count(b'\n')
+
+
+def recover_part_files(output_dir, keep=()):
+    """
+    Publishes the .jsonl.part files an interrupted run left in output_dir (recursively), so
+    their events are not lost. Part files in `keep` are still being written and are skipped,
+    as are parts whose final file already exists. Returns the recovered final paths.
+    """
+    keep = {os.path.abspath(path) for path in keep}
+    recovered = []
+    for root, _, files in os.walk(output_dir):
+        for filename in files:
+            if not filename.endswith('.jsonl.part'):
+                continue
+            part_path = os.path.join(root, filename)
+            final_path = part_path[:-len('.part')]
+            if os.path.abspath(part_path) in keep:
+                continue
+            if os.path.exists(final_path):
+                logger.warning(f"Leaving {part_path}, {final_path} already exists")
+                continue
+            truncate_partial_line(part_path)
+            count = finalize_jsonl(part_path, final_path)
+            logger.info(f"Recovered {count} events of an interrupted run to {final_path}")
+            recovered.append(final_path)
+    return recovered
+
+
+def resume_basename(jobdir, basename):
+    """
+    Output basename of the crawl persisted in JOBDIR. The first run stores its basename there,
+    a resumed run gets it back and appends to the same .part file.
+    """
+    path = os.path.join(jobdir, 'event_export_basename')
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip() or basename
+    os.makedirs(jobdir, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(basename)
+    return basename
+
+
+class JsonLinesWriter:
+    """
+    Append-only JSON Lines file. Every item is flushed immediately, a crash loses at most one line.
+    An existing .part file is continued, so a resumed crawl keeps the events written before.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.part_path = path + '.part'
+        self.count = 0
+        if os.path.exists(self.part_path):
+            self.count = truncate_partial_line(self.part_path)
+        self._file = open(self.part_path, 'a', encoding='utf-8')
+
+    def write(self, item):
+        self._file.write(json.dumps(item, ensure_ascii=False, separators=(',', ':')))
+        self._file.write('\n')
+        self._file.flush()
+        self.count += 1
+
+    def close(self, json_array_path=None):
+        self._file.close()
+        return finalize_jsonl(self.part_path, self.path, json_array_path)
+
+
+class EventExportPipeline:
+    """
+    Item pipeline that streams every event to <output_dir>/<spider.output_basename>.jsonl.
+    Events are normalized to EVENT_FIELDS; spiders of several cities that run in one process
+    can use basenames like "<run>/<city>" to write one run partitioned by city.
+
+    With a JOBDIR the basename is persisted there, so a resumed crawl appends to the .part file
+    of the interrupted one. Leftover .part files of other interrupted runs are published when
+    a spider opens.
+
+    Settings:
+    EVENTS_OUTPUT_DIR  -- target directory (default: scraped_data)
+    EVENTS_JSON_ARRAY  -- also write a compact <basename>.json array when the crawl ends
+    JOBDIR             -- Scrapy job directory of a resumable crawl
+    """
+
+    # Part files written by the pipelines of this process (several spiders can run in one)
+    active_parts = set()
+
+    def __init__(self, output_dir='scraped_data', json_array=False, jobdir=None):
+        self.output_dir = output_dir
+        self.json_array = json_array
+        self.jobdir = jobdir
+        self.writer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            output_dir=crawler.settings.get('EVENTS_OUTPUT_DIR', 'scraped_data'),
+            json_array=crawler.settings.getbool('EVENTS_JSON_ARRAY', False),
+            jobdir=crawler.settings.get('JOBDIR'),
+        )
+
+    def open_spider(self, spider):
+        if self.jobdir:
+            spider.output_basename = resume_basename(self.jobdir, spider.output_basename)
+        path = os.path.join(self.output_dir, f"{spider.output_basename}.jsonl")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.active_parts.add(os.path.abspath(path + '.part'))
+        recover_part_files(self.output_dir, keep=self.active_parts)
+        self.writer = JsonLinesWriter(path)
+        if self.writer.count:
+            logger.info(f"Resuming {self.writer.part_path} after {self.writer.count} events")
+        logger.info(f"Streaming events to {self.writer.part_path}")
+
+    @profiled('export')
+    def process_item(self, item, spider):
+        self.writer.write(normalize_event(item, getattr(spider, 'city', '')))
+        return item
+
+    @profiled('export')
+    def close_spider(self, spider):
+        json_array_path = None
+        if self.json_array:
+            json_array_path = os.path.join(self.output_dir, f"{spider.output_basename}.json")
+        count = self.writer.close(json_array_path)
+        self.active_parts.discard(os.path.abspath(self.writer.part_path))
+        logger.info(f"Saved {count} events to {self.writer.path}" +
+                    (f" and {json_array_path}" if json_array_path else ""))
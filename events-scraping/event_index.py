@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import bisect
+import glob
+import json
+import os
+import re
+from datetime import datetime, timedelta
+
+# "25.05.2025", optionally followed by " - 10:00 Uhr"
+DATE_TIME_RE = re.compile(r'(\d{1,2})\.(\d{1,2})\.(\d{4})(?:\s*-\s*(\d{1,2}):(\d{2})\s*(?:Uhr)?)?')
+EPOCH = datetime(1970, 1, 1)
+
+
+def parse_event_datetimes(datum):
+    """
+    Parses a free-text 'Datum' such as "25.05.2025 - 10:00 Uhr bis 25.05.2025 - 18:00 Uhr"
+    into (start, end) datetimes. Missing times span the whole day; an event with a start time
+    but no end lasts until its start. Returns (None, None) if no date is found.
+    """
+    if not datum:
+        return None, None
+    parts = [DATE_TIME_RE.search(part) for part in datum.split(' bis ', 1)]
+    if not parts[0]:
+        return None, None
+
+    def to_datetime(match, end_of_day):
+        day, month, year, hour, minute = match.groups()
+        try:
+            value = datetime(int(year), int(month), int(day))
+        except ValueError:
+            return None
+        if hour is not None:
+            return value + timedelta(hours=int(hour), minutes=int(minute))
+        return value + timedelta(days=1, minutes=-1) if end_of_day else value
+
+    start = to_datetime(parts[0], end_of_day=False)
+    if len(parts) > 1 and parts[1]:
+        end = to_datetime(parts[1], end_of_day=True)
+    elif parts[0].group(4) is None:
+        end = to_datetime(parts[0], end_of_day=True)
+    else:
+        end = start
+    if start and end and end < start:
+        end = start
+    return start, end
+
+
+def to_minutes(value):
+    return int((value - EPOCH).total_seconds() // 60)
+
+
+def from_minutes(value):
+    return EPOCH + timedelta(minutes=value)
+
+
+class EventIntervalIndex:
+    """
+    Static interval index over event start/end times.
+
+    Events are sorted by start; a max-segment tree over their end times allows enumerating the
+    events that overlap [t1, t2] in O(log n + k): binary search bounds the events starting before
+    t2, the tree skips every subtree whose latest end is before t1. "Starting within the next
+    N hours" is a plain binary search over the sorted starts.
+    """
+
+    def __init__(self, starts, ends, events):
+        self.starts = starts
+        self.ends = ends
+        self.events = events
+        self._build_tree()
+
+    def _build_tree(self):
+        size = 1
+        while size < max(1, len(self.ends)):
+            size *= 2
+        tree = [-1] * (2 * size)
+        tree[size:size + len(self.ends)] = self.ends
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._size = size
+        self._tree = tree
+
+    @classmethod
+    def build(cls, events):
+        """Builds the index from event dicts carrying ISO 'Beginn'/'Ende' (or a parseable 'Datum')."""
+        rows = []
+        for position, event in enumerate(events):
+            if event.get('Beginn'):
+                start = datetime.fromisoformat(event['Beginn'])
+                end = datetime.fromisoformat(event.get('Ende') or event['Beginn'])
+            else:
+                start, end = parse_event_datetimes(event.get('Datum', ''))
+            if start is None:
+                continue
+            summary = {'id': position, 'Name': event.get('Name', ''), 'Datum': event.get('Datum', ''),
+                       'Ort': event.get('Ort', '').split('\n', 1)[0]}
+            rows.append((to_minutes(start), to_minutes(end), summary))
+        rows.sort(key=lambda row: (row[0], row[1]))
+        return cls([row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows])
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlapping(self, t1, t2):
+        """Events whose [start, end] interval overlaps [t1, t2]."""
+        lo, hi = to_minutes(t1), to_minutes(t2)
+        limit = bisect.bisect_right(self.starts, hi)
+        found = []
+        stack = [(1, 0, self._size)]
+        while stack:
+            node, node_lo, node_hi = stack.pop()
+            if node_lo >= limit or self._tree[node] < lo:
+                continue
+            if node >= self._size:
+                found.append(node_lo)
+                continue
+            mid = (node_lo + node_hi) // 2
+            stack.append((2 * node + 1, mid, node_hi))
+            stack.append((2 * node, node_lo, mid))
+        return [self.events[i] for i in sorted(found)]
+
+    def starting_between(self, t1, t2):
+        """Events starting in [t1, t2]."""
+        first = bisect.bisect_left(self.starts, to_minutes(t1))
+        last = bisect.bisect_right(self.starts, to_minutes(t2))
+        return self.events[first:last]
+
+    def starting_within(self, hours, now=None):
+        now = now or datetime.now()
+        return self.starting_between(now, now + timedelta(hours=hours))
+
+    def save(self, filepath):
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump({'start': self.starts, 'end': self.ends, 'events': self.events},
+                      f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, filepath):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['start'], data['end'], data['events'])
+
+
+def read_events(filepath):
+    """Reads events from a JSON array or a JSON Lines file."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        if filepath.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+# Sidecar files next to the event dumps that are not events themselves
+NON_EVENT_SUFFIXES = ('.stats.json', '.compressed.json', '.index.json')
+
+
+def latest_events_file(directory='scraped_data'):
+    """
+    Newest event dump (.jsonl or .json array) in directory, including the city partitions
+    <run>/<city>.jsonl of multi-city runs; sidecars and .part files are skipped.
+    """
+    files = glob.glob(os.path.join(directory, 'saarbruecken_events_*.json*'))
+    files += glob.glob(os.path.join(directory, '*', '*.jsonl'))
+    files = [f for f in files if f.endswith(('.jsonl', '.json')) and not f.endswith(NON_EVENT_SUFFIXES)]
+    return max(files, key=os.path.getmtime) if files else None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or query the event interval index')
+    parser.add_argument('--events', default=None, help='Events JSON/JSONL (default: newest in scraped_data)')
+    parser.add_argument('--index', default=os.path.join('scraped_data', 'event_intervals.index.json'))
+    parser.add_argument('--from', dest='t1', help='Query start, e.g. 2025-05-31T00:00')
+    parser.add_argument('--to', dest='t2', help='Query end, e.g. 2025-06-01T23:59')
+    parser.add_argument('--next-hours', type=float, help='Events starting within the next N hours')
+    args = parser.parse_args()
+
+    if args.t1 or args.next_hours:
+        index = EventIntervalIndex.load(args.index)
+        if args.next_hours:
+            results = index.starting_within(args.next_hours)
+        else:
+            t1 = datetime.fromisoformat(args.t1)
+            results = index.overlapping(t1, datetime.fromisoformat(args.t2) if args.t2 else t1)
+        for event in results:
+            print(f"{event['Datum']}  {event['Name']}  ({event['Ort']})")
+        print(f"{len(results)} events")
+    else:
+        events_file = args.events or latest_events_file()
+        index = EventIntervalIndex.build(read_events(events_file))
+        index.save(args.index)
+        print(f"Indexed {len(index)} events from {events_file} into {args.index}")
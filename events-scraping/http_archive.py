@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+# Scrapy's HTTP cache doubles as a record/replay archive: every response is stored gzip
+# compressed under HTTPCACHE_DIR, keyed by the request fingerprint.
+ARCHIVE_META_FILE = 'recording.json'
+
+
+def record_settings(archive_dir):
+    """Settings that store every response (any status, never expiring) in archive_dir."""
+    return {
+        'HTTPCACHE_ENABLED': True,
+        'HTTPCACHE_DIR': os.path.abspath(archive_dir),
+        'HTTPCACHE_STORAGE': 'scrapy.extensions.httpcache.FilesystemCacheStorage',
+        'HTTPCACHE_POLICY': 'scrapy.extensions.httpcache.DummyPolicy',
+        'HTTPCACHE_GZIP': True,
+        'HTTPCACHE_EXPIRATION_SECS': 0,
+        'HTTPCACHE_IGNORE_HTTP_CODES': [],
+    }
+
+
+def replay_settings(archive_dir):
+    """
+    Settings that serve all responses from archive_dir and never touch the network.
+    Requests missing from the archive are dropped. Delays and throttling are disabled, so
+    the spider runs at full CPU speed.
+    """
+    settings = record_settings(archive_dir)
+    settings.update({
+        'HTTPCACHE_IGNORE_MISSING': True,
+        'DOWNLOAD_DELAY': 0,
+        'AUTOTHROTTLE_ENABLED': False,
+        'CONCURRENT_REQUESTS': 64,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 64,
+        'ROBOTSTXT_OBEY': False,
+    })
+    return settings
+
+
+def save_recording_meta(archive_dir, **meta):
+    """
+    Stores the spider arguments of a recording (e.g. the crawled date range). The start URL
+    depends on them, so a replay has to use the same values to hit the archive.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    with open(os.path.join(archive_dir, ARCHIVE_META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+def load_recording_meta(archive_dir):
+    path = os.path.join(archive_dir, ARCHIVE_META_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{archive_dir} is not a recorded archive ({ARCHIVE_META_FILE} missing)")
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -2,79 +2,186 @@
 # -*- coding: utf-8 -*-
 
 import scrapy
-from datetime import date
+from datetime import date, timedelta
 from scrapy.crawler import CrawlerProcess
 from scrapy.exceptions import CloseSpider
-import csv
+import argparse
 import time
 from datetime import datetime
 import re
-import logging
-import json
 import os
+import sys
 
+from crawl_metrics import SAMPLED, CrawlMetrics, get_parser_logger, stop_parser_logger
+from crawl_state import CrawlStateStore, content_hash, list_fingerprint
+from event_index import parse_event_datetimes
+from http_archive import load_recording_meta, record_settings, replay_settings, save_recording_meta
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shared'))
+from profiling import add_profile_arguments, profiled, profiler_from_args
+
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Crawl profiles. Politeness is enforced by Scrapy's downloader per domain slot:
+# DOWNLOAD_DELAY is derived from the requests-per-second budget and AutoThrottle never
+# goes below it, so raising concurrency does not exceed the configured rate.
+CRAWL_PROFILES = {
+    # One request per second, one request in flight - the historical behaviour
+    'polite': {
+        'requests_per_second': 1.0,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 1,
+        'AUTOTHROTTLE_TARGET_CONCURRENCY': 1.0,
+        'AUTOTHROTTLE_MAX_DELAY': 3,
+    },
+    # Full crawls in minutes: several requests in flight, bounded by the rps budget
+    'throughput': {
+        'requests_per_second': 8.0,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 8,
+        'AUTOTHROTTLE_TARGET_CONCURRENCY': 4.0,
+        'AUTOTHROTTLE_MAX_DELAY': 5,
+    },
+}
+
+
+def build_settings(profile='polite', requests_per_second=None):
+    """
+    Returns CrawlerProcess settings for a crawl profile.
+    requests_per_second overrides the profile's budget per domain.
+    """
+    profile_settings = dict(CRAWL_PROFILES[profile])
+    default_rps = profile_settings.pop('requests_per_second')
+    rps = requests_per_second or default_rps
+    delay = 1.0 / rps
+    settings = {
+        'USER_AGENT': USER_AGENT,
+        'DOWNLOAD_DELAY': delay,
+        'CONCURRENT_REQUESTS': max(16, profile_settings['CONCURRENT_REQUESTS_PER_DOMAIN']),
+        'AUTOTHROTTLE_ENABLED': True,
+        'AUTOTHROTTLE_START_DELAY': delay,
+        'LOG_LEVEL': 'INFO', # Scrapy's own log level for console
+        'DUPEFILTER_DEBUG': True, # Enable dupefilter debugging
+    }
+    settings.update(profile_settings)
+    return settings
+
+
+def date_shards(start, end, months=1):
+    """
+    Splits the date range [start, end] into consecutive shards of `months` calendar months
+    (the first and last shard are clipped to the range). months=0 returns the whole range.
+    """
+    if months <= 0:
+        return [(start, end)]
+    shards = []
+    shard_start = start
+    while shard_start <= end:
+        month_index = shard_start.year * 12 + shard_start.month - 1 + months
+        next_start = date(month_index // 12, month_index % 12 + 1, 1)
+        shard_end = min(end, next_start - timedelta(days=1))
+        shards.append((shard_start, shard_end))
+        shard_start = next_start
+    return shards
 
 
 class SaarbrueckenEventSpider(scrapy.Spider):
     name = 'saarbruecken_events'
+    city = 'Saarbrücken'
+    custom_settings = {
+        'ITEM_PIPELINES': {'event_export.EventExportPipeline': 300},
+    }
     
-    def __init__(self, test_mode=False, max_events=30, *args, **kwargs):
+    def __init__(self, test_mode=False, max_events=30, incremental=False, state_db=None,
+                 start_date=None, end_date=None, output_basename=None, log_sample_rate=50,
+                 shard_months=1, horizon_days=None, categories=None, *args, **kwargs):
         super(SaarbrueckenEventSpider, self).__init__(*args, **kwargs)
         
-        # --- Logger Setup ---
-        logger_name = f'{self.name}_parser_debug_{datetime.now().strftime("%Y%m%d%H%M%S%f")}'
-        self.parser_logger = logging.getLogger(logger_name)
-        self.parser_logger.setLevel(logging.INFO)
-        
-        parser_fh = logging.FileHandler('parser_debug.log', mode='w')
-        parser_fh.setLevel(logging.INFO)
-        
-        parser_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        parser_fh.setFormatter(parser_formatter)
-        
-        self.parser_logger.addHandler(parser_fh)
-        self.parser_logger.propagate = False
-        # --- End Logger Setup ---
+        # Queue-based parser log (written by a background thread); per-item lines are sampled
+        self.parser_logger = get_parser_logger(f'{self.name}.parser', 'parser_debug.log',
+                                               sample_rate=log_sample_rate)
+        self.metrics = CrawlMetrics()
 
         self.test_mode = bool(test_mode)
         self.max_events = int(max_events)
-        self.results = [] # Initialize results for the instance
+        # Date range as DD.MM.YYYY; defaults to today until the end of next year
+        self.start_date = start_date
+        self.end_date = end_date
+        # The range is crawled as concurrent shards of shard_months months (0 = one range)
+        self.shard_months = int(shard_months)
+        # List-page pre-filters: only fetch details of events starting within horizon_days
+        # and, if given, of the allowed categories (Art, comma separated)
+        self.horizon_days = int(horizon_days) if horizon_days else None
+        if isinstance(categories, str):
+            categories = categories.split(',')
+        self.categories = {c.strip().lower() for c in categories or [] if c.strip()}
+        # Events are streamed to disk by event_export.EventExportPipeline, only count them here
+        self.event_count = 0
+        run_timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.output_basename = f"saarbruecken_events_{run_timestamp}"
+        if self.test_mode:
+            self.output_basename = f"saarbruecken_events_TEST_{self.max_events}_items_{run_timestamp}"
+        if output_basename:
+            self.output_basename = output_basename
+
+        # Incremental mode: skip detail pages that were scraped before and did not change
+        self.state = None
+        if incremental:
+            if not os.path.exists("scraped_data"):
+                os.makedirs("scraped_data")
+            self.state = CrawlStateStore(state_db or os.path.join("scraped_data", "crawl_state.sqlite3"))
         
         self.parser_logger.info(f"Spider initialized. Logger: {self.parser_logger.name}. test_mode={self.test_mode}, max_events={self.max_events}")
     
     def start_requests(self):
         today = date.today()
-        start_date_str = today.strftime("%d.%m.%Y")
+        start = datetime.strptime(self.start_date, "%d.%m.%Y").date() if self.start_date else today
         
         # Set end date to the end of the next year for a wide range
-        end_date_year = today.year + 1 
-        end_date_str = f"31.12.{end_date_year}"
+        end = datetime.strptime(self.end_date, "%d.%m.%Y").date() if self.end_date else date(today.year + 1, 12, 31)
+        if self.horizon_days:
+            end = min(end, start + timedelta(days=self.horizon_days))
+        self.horizon_end = datetime.combine(end, datetime.max.time())
         
         base_url = "https://tourismus.saarbruecken.de/events"
-        # Construct the dynamic URL using the same query parameter structure
-        dynamic_url = f"{base_url}?fav_list=&q=&category=&range_date={start_date_str}+-+{end_date_str}"
-        
-        self.parser_logger.info(f"Dynamically generated start URL: {dynamic_url}")
-        self.parser_logger.info(f"Spider settings: test_mode={self.test_mode}, max_events={self.max_events}, results_len={len(self.results)}")
-        yield scrapy.Request(url=dynamic_url, callback=self.parse, meta={'is_initial_request': True})
+        self.parser_logger.info(f"Spider settings: test_mode={self.test_mode}, max_events={self.max_events}, "
+                                f"shard_months={self.shard_months}, horizon_days={self.horizon_days}, categories={sorted(self.categories)}")
+        # One start request per shard; Scrapy crawls the shards (and their pagination) concurrently
+        for shard_start, shard_end in date_shards(start, end, self.shard_months):
+            # Construct the dynamic URL using the same query parameter structure
+            dynamic_url = (f"{base_url}?fav_list=&q=&category=&range_date="
+                           f"{shard_start.strftime('%d.%m.%Y')}+-+{shard_end.strftime('%d.%m.%Y')}")
+            self.parser_logger.info(f"Dynamically generated start URL: {dynamic_url}")
+            yield scrapy.Request(url=dynamic_url, callback=self.parse, meta={'is_initial_request': True})
+
+    @profiled('classify')
+    def is_wanted(self, art, date_text):
+        """List-page pre-filter by category allow-list and horizon, before a detail request is issued."""
+        if self.categories and art and art.lower() not in self.categories:
+            return False
+        if self.horizon_days:
+            start, _ = parse_event_datetimes(date_text)
+            if start and start > self.horizon_end:
+                return False
+        return True
     
-    # results are now initialized in __init__
     
+    @profiled('parse')
     def parse(self, response):
         """
         Parse the event list page, extract basic information and follow links to detail pages
         """
-        self.parser_logger.info(f"ENTERING parse method for URL: {response.url}")
-        self.parser_logger.info(f"Initial state in parse: test_mode={self.test_mode}, len(results)={len(self.results)}, max_events={self.max_events}")
-        self.parser_logger.info(f"Parsing list page: {response.url}")
-        
+        parse_started = time.perf_counter()
+        self.metrics.inc('list_pages')
+        self.metrics.observe('list_download_latency', response.meta.get('download_latency'))
+
         # Extract events from the grid layout
         event_items = response.css('div.event-item')
-        self.parser_logger.info(f"Found {len(event_items)} events on page {response.url}. Current results: {len(self.results)}")
+        self.metrics.inc('list_items', len(event_items))
+        self.parser_logger.info(f"Found {len(event_items)} events on page {response.url}. Current results: {self.event_count}")
         
         # Check if we've reached the maximum number of events in test mode
-        if self.test_mode and len(self.results) >= self.max_events:
-            self.parser_logger.info(f"Test mode in PARSE (top): Reached maximum of {self.max_events} events ({len(self.results)}). Stopping further processing in this parse method.")
+        if self.test_mode and self.event_count >= self.max_events:
+            self.parser_logger.info(f"Test mode in PARSE (top): Reached maximum of {self.max_events} events ({self.event_count}). Stopping further processing in this parse method.")
             return
         
         for item in event_items:
@@ -117,24 +224,34 @@ class SaarbrueckenEventSpider(scrapy.Spider):
                 'Website': ''
             }
             
-            self.parser_logger.info(f"Extracted event: {name}, URL: {detail_url}")
+            self.parser_logger.info(f"Extracted event: {name}, URL: {detail_url}", extra=SAMPLED)
             
             # Follow the link to the detail page
             if detail_url:
-                if self.test_mode and len(self.results) >= self.max_events:
-                    self.parser_logger.info(f"Test mode in PARSE (item loop): Skipping detail request for {event_data.get('Name')} as max_events ({self.max_events}) reached.")
+                if self.test_mode and self.event_count >= self.max_events:
+                    self.parser_logger.info(f"Test mode in PARSE (item loop): Skipping detail request for {event_data.get('Name')} as max_events ({self.max_events}) reached.", extra=SAMPLED)
+                    self.metrics.inc('detail_skipped_test_mode')
                     continue # Skip to next item if max events reached
-                self.parser_logger.info(f"Preparing to yield request for detail_url: {detail_url} with event_data: {event_data}")
+                if not self.is_wanted(art, date_text):
+                    self.metrics.inc('detail_skipped_prefilter')
+                    continue
+                fingerprint = list_fingerprint(name, date_text, ort)
+                if self.state and self.state.is_unchanged(detail_url, fingerprint):
+                    self.parser_logger.info(f"Incremental: listing unchanged, skipping detail request for {detail_url}", extra=SAMPLED)
+                    self.metrics.inc('detail_skipped_unchanged_listing')
+                    continue
                 yield scrapy.Request(
                     detail_url,
                     callback=self.parse_detail,
-                    meta={'event_data': event_data, 'dont_redirect': True, 'handle_httpstatus_list': [301, 302]},
+                    meta={'event_data': event_data, 'fingerprint': fingerprint, 'dont_redirect': True, 'handle_httpstatus_list': [301, 302]},
                     priority=1 # Higher priority for detail pages
                 )
         
+        self.metrics.observe('list_parse_time', time.perf_counter() - parse_started)
+
         # Look for pagination links
         next_page = response.css('li.next a::attr(href)').get()
-        if next_page and (not self.test_mode or len(self.results) < self.max_events):
+        if next_page and (not self.test_mode or self.event_count < self.max_events):
             # Create a full URL if it's a relative path
             if not next_page.startswith(('http://', 'https://')):
                 next_page = response.urljoin(next_page)
@@ -146,15 +263,20 @@ class SaarbrueckenEventSpider(scrapy.Spider):
                 callback=self.parse
             )
     
+    @profiled('parse')
     def parse_detail(self, response):
         """
         Parse the individual event detail page to extract more information
         """
-        # Add a delay to be polite to the server
-        time.sleep(1)
-            
+        # Politeness is handled by the downloader (DOWNLOAD_DELAY/AutoThrottle per domain),
+        # never sleep here: it would block the reactor and serialize all detail pages.
+
+        parse_started = time.perf_counter()
+        self.metrics.inc('detail_pages')
+        self.metrics.observe('detail_download_latency', response.meta.get('download_latency'))
+
         # Get the event data passed from the list page
-        self.parser_logger.info(f"ENTERING parse_detail for URL: {response.url}. Event data from meta: {response.meta.get('event_data', {})}")
+        self.parser_logger.info(f"ENTERING parse_detail for URL: {response.url}", extra=SAMPLED)
         event_data = response.meta.get('event_data', {})
 
         # Initialize fields that might be missing or need updating from detail page
@@ -164,13 +286,14 @@ class SaarbrueckenEventSpider(scrapy.Spider):
         event_data.setdefault('Datum', '')
         event_data.setdefault('Telefon', '')
         event_data.setdefault('Website', '')
+        event_data['Detailseite'] = response.url
         event_data.setdefault('Bild', '')
         event_data.setdefault('Beschreibung', '')
         event_data.setdefault('Ticketvorverkauf', '')
+        event_data.setdefault('Beginn', '')
+        event_data.setdefault('Ende', '')
         
         try:
-            self.parser_logger.info(f"Processing event in parse_detail: {event_data.get('Name', 'N/A')}. Current results count: {len(self.results)}")
-            
             # Extract or refine the event name from the detail page
             name_detail = response.css('h1.headline::text').get()
             if name_detail and name_detail.strip():
@@ -217,6 +340,12 @@ class SaarbrueckenEventSpider(scrapy.Spider):
                         if ticket_price:
                             event_data['Ticketvorverkauf'] = ticket_price.strip()
             
+            # Structured start/end times (ISO 8601) parsed from the free-text Datum
+            start, end = parse_event_datetimes(event_data['Datum'])
+            if start:
+                event_data['Beginn'] = start.isoformat(timespec='minutes')
+                event_data['Ende'] = end.isoformat(timespec='minutes')
+
             # Extract Bild URL (Image URL)
             # Priority: 1. meta og:image (name), 2. meta og:image (property), 3. div.thumbnail img[data-interchange]
             bild_url = response.css('meta[name="og:image"]::attr(content)').get()
@@ -234,7 +363,7 @@ class SaarbrueckenEventSpider(scrapy.Spider):
             if bild_url:
                 event_data['Bild'] = response.urljoin(bild_url.strip())
             # If no image found, 'Bild' remains '' due to setdefault
-            self.parser_logger.info(f"Processed Bild: {event_data['Bild']}")
+            self.parser_logger.info(f"Processed Bild: {event_data['Bild']}", extra=SAMPLED)
 
             # Extract Beschreibung (Description)
             beschreibung_parts = []
@@ -249,20 +378,36 @@ class SaarbrueckenEventSpider(scrapy.Spider):
             if beschreibung_parts:
                 event_data['Beschreibung'] = '\n\n'.join(beschreibung_parts)
             # If no description found, 'Beschreibung' remains '' due to setdefault
-            self.parser_logger.info(f"Processed Beschreibung: {event_data.get('Beschreibung', '')[:100]}...")
+            self.parser_logger.info(f"Processed Beschreibung: {event_data.get('Beschreibung', '')[:100]}...", extra=SAMPLED)
 
             # After all processing, add the event data to results
             if event_data.get('Name'): # Ensure there's at least a name
                 # Check if we've reached the maximum number of events in test mode
-                if self.test_mode and len(self.results) >= self.max_events:
-                    self.parser_logger.info(f"Test mode in PARSE_DETAIL: Reached maximum of {self.max_events} events ({len(self.results)}). Current event '{event_data.get('Name')}' will NOT be added. Raising CloseSpider.")
+                if self.test_mode and self.event_count >= self.max_events:
+                    self.parser_logger.info(f"Test mode in PARSE_DETAIL: Reached maximum of {self.max_events} events ({self.event_count}). Current event '{event_data.get('Name')}' will NOT be added. Raising CloseSpider.")
                     raise CloseSpider(reason=f'test_mode_max_events_reached_in_parse_detail: {self.max_events}')
-                
+
+                if self.state:
+                    new_hash = content_hash(event_data)
+                    fingerprint = response.meta.get('fingerprint', '')
+                    if not self.state.content_changed(response.url, new_hash):
+                        self.state.record(response.url, fingerprint, new_hash)
+                        self.parser_logger.info(f"Incremental: content unchanged for {response.url}, not emitted.", extra=SAMPLED)
+                        self.metrics.inc('items_unchanged_content')
+                        self.metrics.observe('detail_parse_time', time.perf_counter() - parse_started)
+                        return
+
+                self.metrics.observe('detail_parse_time', time.perf_counter() - parse_started)
                 yield event_data
-                self.results.append(event_data)
-                self.parser_logger.info(f"Event '{event_data.get('Name')}' added to results. Total results: {len(self.results)}")
+                self.event_count += 1
+                self.metrics.inc('items_emitted')
+                if self.state:
+                    # Recorded only after the item was handed over, so an interrupted crawl re-fetches it
+                    self.state.record(response.url, fingerprint, new_hash)
+                self.parser_logger.info(f"Event '{event_data.get('Name')}' added to results. Total results: {self.event_count}", extra=SAMPLED)
             else:
                 self.parser_logger.warning(f"Event at {response.url} lacked a name after parsing detail page. Not added.")
+                self.metrics.inc('items_dropped_no_name')
 
         except CloseSpider as cs:
             # Re-raise CloseSpider to ensure it's handled by Scrapy's core
@@ -270,6 +415,7 @@ class SaarbrueckenEventSpider(scrapy.Spider):
             raise
         except Exception as e:
             self.parser_logger.error(f"Error parsing detail page {response.url}: {str(e)}", exc_info=True)
+            self.metrics.inc('items_dropped_error')
             # Optionally, re-raise or handle as per spider's error policy
             # If event_data was partially populated, it might still be added if not critical error
             # For now, if an error occurs, we don't add potentially incomplete data from this point.
@@ -284,6 +430,7 @@ class SaarbrueckenEventSpider(scrapy.Spider):
         date_text = re.sub(r'\s+', ' ', date_text).strip()
         return date_text
     
+    @profiled('classify')
     def process_date(self, date_text):
         """
         Process and format date information according to requirements
@@ -325,24 +472,24 @@ class SaarbrueckenEventSpider(scrapy.Spider):
     def closed(self, reason):
         """
         Called when the spider is closed.
-        Saves the scraped data to a JSON file.
+        The events were already streamed to scraped_data/<output_basename>.jsonl by the pipeline.
         """
-        self.parser_logger.info(f"Spider closed: {reason}. Total events in self.results: {len(self.results)}")
-        # Save the results to a JSON file
-        filename = f"saarbruecken_events_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        if self.test_mode:
-            filename = f"saarbruecken_events_TEST_{self.max_events}_items_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
-        # Ensure results directory exists
-        output_dir = "scraped_data"
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-        full_path = os.path.join(output_dir, filename)
+        self.parser_logger.info(f"Spider closed: {reason}. Total events emitted: {self.event_count}")
 
-        with open(full_path, 'w', encoding='utf-8') as jsonfile:
-            json.dump(self.results, jsonfile, ensure_ascii=False, indent=4)
-        
-        self.parser_logger.info(f"Scraped {len(self.results)} events and saved to {full_path}")
+        extra = {'reason': reason}
+        if self.state:
+            self.parser_logger.info(f"Incremental crawl stats: {self.state.stats}")
+            extra['incremental'] = self.state.stats
+            self.state.close()
+        crawler = getattr(self, 'crawler', None)
+        if crawler is not None:
+            extra['scrapy_stats'] = {key: value if isinstance(value, (int, float, str)) else str(value)
+                                     for key, value in crawler.stats.get_stats().items()}
+        # Own subdirectory, so the report is never mistaken for an event dump
+        stats_path = os.path.join("scraped_data", "stats", f"{self.output_basename}.stats.json")
+        report = self.metrics.write_report(stats_path, **extra)
+        self.parser_logger.info(f"Crawl stats written to {stats_path}: {report['counters']}")
+        stop_parser_logger(self.parser_logger.name)
 
 
 # Run the spider if this script is executed directly
@@ -350,22 +497,68 @@ if __name__ == "__main__":
     # BasicConfig for root logger (Scrapy uses its own)
     # logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s') 
     # Our custom logger 'parser_detail_debug' is already configured.
+    parser = argparse.ArgumentParser(description='Saarbrücken events scraper')
+    parser.add_argument('--profile', choices=sorted(CRAWL_PROFILES), default='polite',
+                        help='Crawl profile (default: polite)')
+    parser.add_argument('--rps', type=float, default=None,
+                        help='Requests per second budget per domain (overrides the profile)')
+    parser.add_argument('--test-mode', action='store_true', help='Stop after --max-events events')
+    parser.add_argument('--max-events', type=int, default=30)
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only fetch new or modified events (state in scraped_data/crawl_state.sqlite3)')
+    parser.add_argument('--state-db', default=None, help='Path of the incremental crawl state database')
+    parser.add_argument('--json-array', action='store_true',
+                        help='Additionally write a compact JSON array when the crawl is finished')
+    parser.add_argument('--jobdir', default=None,
+                        help='Scrapy JOBDIR to persist the request queue, so an interrupted crawl can be resumed')
+    parser.add_argument('--output-basename', default=None,
+                        help='Basename of the output in scraped_data/ (default: saarbruecken_events_<timestamp>)')
+    parser.add_argument('--start-date', default=None, help='First day to crawl (DD.MM.YYYY, default: today)')
+    parser.add_argument('--end-date', default=None, help='Last day to crawl (DD.MM.YYYY, default: end of next year)')
+    parser.add_argument('--shard-months', type=int, default=1,
+                        help='Crawl the date range as concurrent shards of N months (0 = one range, default: 1)')
+    parser.add_argument('--horizon-days', type=int, default=None,
+                        help='Only crawl events starting within N days, e.g. 56 for the next eight weeks')
+    parser.add_argument('--categories', default=None,
+                        help='Comma-separated allow-list of categories (Art), e.g. "Konzert,Theater"')
+    archive_group = parser.add_mutually_exclusive_group()
+    archive_group.add_argument('--record', metavar='ARCHIVE_DIR',
+                               help='Store every response gzip-compressed in ARCHIVE_DIR')
+    archive_group.add_argument('--replay', metavar='ARCHIVE_DIR',
+                               help='Run offline from a recorded ARCHIVE_DIR without delays')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
 
-    # Settings for the spider run
-    current_test_mode = False
-    current_max_events = 30   # Reduced for testing `CloseSpider` behavior
-    
-    print(f"Configuring CrawlerProcess. test_mode={current_test_mode}, max_events={current_max_events}")
-    
-    process = CrawlerProcess({
-        'USER_AGENT': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'DOWNLOAD_DELAY': 1, # Slightly reduced for faster testing, but be mindful of server load
-        'AUTOTHROTTLE_ENABLED': True,
-        'AUTOTHROTTLE_START_DELAY': 0.5,
-        'AUTOTHROTTLE_MAX_DELAY': 3,
-        'LOG_LEVEL': 'INFO', # Scrapy's own log level for console
-        'DUPEFILTER_DEBUG': True, # Enable dupefilter debugging
-        # 'LOG_FILE': None, # To prevent Scrapy from creating its own log file if not desired
-    })
-    process.crawl(SaarbrueckenEventSpider, test_mode=current_test_mode, max_events=current_max_events)
-    process.start()
+    start_date = args.start_date or date.today().strftime("%d.%m.%Y")
+    end_date = args.end_date or f"31.12.{date.today().year + 1}"
+    settings = build_settings(args.profile, args.rps)
+    if args.record:
+        settings.update(record_settings(args.record))
+        save_recording_meta(args.record, start_date=start_date, end_date=end_date,
+                            shard_months=args.shard_months, horizon_days=args.horizon_days)
+    elif args.replay:
+        settings.update(replay_settings(args.replay))
+        recording = load_recording_meta(args.replay)
+        start_date, end_date = recording['start_date'], recording['end_date']
+        args.shard_months = recording.get('shard_months', 0)
+        args.horizon_days = recording.get('horizon_days')
+    if args.jobdir:
+        settings['JOBDIR'] = args.jobdir
+    settings['EVENTS_JSON_ARRAY'] = args.json_array
+    print(f"Configuring CrawlerProcess. profile={args.profile}, delay={settings['DOWNLOAD_DELAY']:.3f}s, "
+          f"test_mode={args.test_mode}, max_events={args.max_events}")
+
+    process = CrawlerProcess(settings)
+    process.crawl(SaarbrueckenEventSpider, test_mode=args.test_mode, max_events=args.max_events,
+                  incremental=args.incremental, state_db=args.state_db,
+                  start_date=start_date, end_date=end_date, shard_months=args.shard_months,
+                  horizon_days=args.horizon_days, categories=args.categories,
+                  output_basename=args.output_basename)
+    # Callbacks are charged to parse/classify, the item pipeline to export and everything else
+    # on the reactor thread (downloader, scheduler, throttling) to fetch
+    profiler = profiler_from_args(args, 'saarbruecken_events', default_phase='fetch')
+    try:
+        process.start()
+    finally:
+        if profiler:
+            profiler.stop()
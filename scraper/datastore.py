@@ -0,0 +1,315 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+from export_records import NULL_VALUES, load_locations
+
+DEFAULT_DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "quattropole.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transport (
+    id INTEGER PRIMARY KEY,
+    osm_id INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    name TEXT, city TEXT, country TEXT, source TEXT, operator TEXT,
+    lon REAL, lat REAL,
+    properties TEXT,
+    snapshot TEXT,
+    updated_at TEXT,
+    UNIQUE (osm_id, type)
+);
+CREATE INDEX IF NOT EXISTS transport_city_type ON transport (city, type);
+CREATE VIRTUAL TABLE IF NOT EXISTS transport_rtree USING rtree (id, min_lon, max_lon, min_lat, max_lat);
+
+CREATE TABLE IF NOT EXISTS shops (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    kind TEXT, name TEXT, categories TEXT, address TEXT, phone TEXT,
+    opening_hours TEXT, website TEXT, description TEXT, images TEXT,
+    lon REAL, lat REAL,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS shops_kind_name ON shops (kind, name);
+CREATE VIRTUAL TABLE IF NOT EXISTS shops_rtree USING rtree (id, min_lon, max_lon, min_lat, max_lat);
+
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    datum TEXT NOT NULL,
+    name TEXT, art TEXT, ort TEXT, city TEXT,
+    start TEXT, end TEXT,
+    phone TEXT, website TEXT, image TEXT, description TEXT, tickets TEXT,
+    updated_at TEXT,
+    UNIQUE (url, datum)
+);
+CREATE INDEX IF NOT EXISTS events_start ON events (start);
+CREATE INDEX IF NOT EXISTS events_city_start ON events (city, start);
+"""
+
+_DATE_TIME_RE = re.compile(r"(\d{2})\.(\d{2})\.(\d{4})(?: - (\d{2}):(\d{2}) Uhr)?")
+
+
+def _clean(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return None if value in NULL_VALUES else value
+
+
+def datum_bounds(datum):
+    """
+    Start and end (ISO, to the minute) of a Datum like "25.05.2025 - 10:00 Uhr bis 25.05.2025 - 18:00 Uhr".
+    Used for event files written before the spider emitted Beginn/Ende; a date-only end means 23:59.
+    """
+    matches = _DATE_TIME_RE.findall(datum or "")
+    if not matches:
+        return None, None
+
+    def to_iso(match, end_of_day):
+        day, month, year, hour, minute = match
+        if not hour:
+            hour, minute = ("23", "59") if end_of_day else ("00", "00")
+        return f"{year}-{month}-{day}T{hour}:{minute}"
+
+    end = to_iso(matches[-1], True) if len(matches) > 1 or not matches[0][3] else to_iso(matches[0], False)
+    return to_iso(matches[0], False), end
+
+
+class DataStore:
+    """
+    One SQLite database for the transport features, the scraped shops/restaurants and the
+    events, replacing "pick the newest export file" in every consumer.
+
+    Every import is an upsert: transport features are keyed by (osm_id, type), as one OSM
+    object can be exported as several types (e.g. E-Auto and E-Bike Ladestation), shops by
+    their detail page URL and events by (detail page URL, Datum), so re-importing a newer
+    export updates rows in place. Coordinates are indexed in R*Tree tables, event start times in a B-tree.
+    The database runs in WAL mode, so readers never block the importing writer.
+    """
+
+    def __init__(self, path=DEFAULT_DB_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _index_point(self, table, row_id, lon, lat):
+        if lon is None or lat is None:
+            self.conn.execute(f"DELETE FROM {table}_rtree WHERE id = ?", (row_id,))
+        else:
+            self.conn.execute(f"INSERT OR REPLACE INTO {table}_rtree VALUES (?, ?, ?, ?, ?)",
+                              (row_id, lon, lon, lat, lat))
+
+    def upsert_transport(self, features, snapshot=None):
+        """Upserts GeoJSON point features (properties as written by getTransport.py)."""
+        now = datetime.now().isoformat(timespec="seconds")
+        count = 0
+        with self.conn:
+            for feature in features:
+                props = feature.get("properties") or {}
+                osm_id = props.get("osm_id")
+                coords = (feature.get("geometry") or {}).get("coordinates") or [None, None]
+                if osm_id is None:
+                    continue
+                lon, lat = coords[0], coords[1]
+                self.conn.execute(
+                    """INSERT INTO transport (osm_id, name, type, city, country, source, operator, lon, lat,
+                                              properties, snapshot, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (osm_id, type) DO UPDATE SET
+                           name = excluded.name, city = excluded.city,
+                           country = excluded.country, source = excluded.source, operator = excluded.operator,
+                           lon = excluded.lon, lat = excluded.lat, properties = excluded.properties,
+                           snapshot = excluded.snapshot, updated_at = excluded.updated_at""",
+                    (osm_id, props.get("name"), props.get("type"), props.get("city"), props.get("country"),
+                     props.get("source"), props.get("operator"), lon, lat,
+                     json.dumps(props, ensure_ascii=False, separators=(",", ":")), snapshot, now))
+                row_id = self.conn.execute("SELECT id FROM transport WHERE osm_id = ? AND type = ?",
+                                           (osm_id, props.get("type"))).fetchone()[0]
+                self._index_point("transport", row_id, lon, lat)
+                count += 1
+        return count
+
+    def upsert_shops(self, rows, kind="shop", locations=None):
+        """
+        Upserts rows of a scraped shop or restaurant CSV. Rows without a 'Detail URL' (CSVs
+        scraped before it was recorded) are keyed by kind, name and address instead.
+        """
+        locations = locations or {}
+        now = datetime.now().isoformat(timespec="seconds")
+        count = 0
+        with self.conn:
+            for row in rows:
+                name = _clean(row.get("Name"))
+                if not name:
+                    continue
+                url = _clean(row.get("Detail URL")) or f"{kind}:{name}|{_clean(row.get('Adresse')) or ''}"
+                lon, lat = locations.get(name, (None, None))
+                self.conn.execute(
+                    """INSERT INTO shops (url, kind, name, categories, address, phone, opening_hours, website,
+                                          description, images, lon, lat, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (url) DO UPDATE SET
+                           kind = excluded.kind, name = excluded.name, categories = excluded.categories,
+                           address = excluded.address, phone = excluded.phone,
+                           opening_hours = excluded.opening_hours, website = excluded.website,
+                           description = excluded.description, images = excluded.images,
+                           lon = COALESCE(excluded.lon, shops.lon), lat = COALESCE(excluded.lat, shops.lat),
+                           updated_at = excluded.updated_at""",
+                    (url, kind, name, _clean(row.get("Kategorien")), _clean(row.get("Adresse")),
+                     _clean(row.get("Kontaktinformationen")), _clean(row.get("Öffnungszeiten")),
+                     _clean(row.get("Website URL")), _clean(row.get("Beschreibung")),
+                     _clean(row.get("Image Source URLs")), lon, lat, now))
+                row_id, lon, lat = self.conn.execute("SELECT id, lon, lat FROM shops WHERE url = ?", (url,)).fetchone()
+                self._index_point("shops", row_id, lon, lat)
+                count += 1
+        return count
+
+    def upsert_events(self, events):
+        """
+        Upserts events keyed by (Detailseite, Datum). Events exported before the detail page
+        was recorded fall back to the organizer Website and Name.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        count = 0
+        with self.conn:
+            for event in events:
+                name = _clean(event.get("Name"))
+                if not name:
+                    continue
+                datum = event.get("Datum") or ""
+                url = _clean(event.get("Detailseite")) or f"{_clean(event.get('Website')) or ''}|{name}"
+                start, end = _clean(event.get("Beginn")), _clean(event.get("Ende"))
+                if not start:
+                    start, end = datum_bounds(datum)
+                self.conn.execute(
+                    """INSERT INTO events (url, datum, name, art, ort, city, start, end, phone, website, image,
+                                           description, tickets, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (url, datum) DO UPDATE SET
+                           name = excluded.name, art = excluded.art, ort = excluded.ort, city = excluded.city,
+                           start = excluded.start, end = excluded.end, phone = excluded.phone,
+                           website = excluded.website, image = excluded.image,
+                           description = excluded.description, tickets = excluded.tickets,
+                           updated_at = excluded.updated_at""",
+                    (url, datum, name, _clean(event.get("Art")), _clean(event.get("Ort")),
+                     _clean(event.get("Stadt")) or "Saarbrücken", start, end, _clean(event.get("Telefon")),
+                     _clean(event.get("Website")), _clean(event.get("Bild")), _clean(event.get("Beschreibung")),
+                     _clean(event.get("Ticketvorverkauf")), now))
+                count += 1
+        return count
+
+    def transport_in_bbox(self, min_lon, min_lat, max_lon, max_lat, feature_type=None):
+        query = """SELECT t.* FROM transport_rtree r JOIN transport t ON t.id = r.id
+                   WHERE r.min_lon >= ? AND r.max_lon <= ? AND r.min_lat >= ? AND r.max_lat <= ?"""
+        params = [min_lon, max_lon, min_lat, max_lat]
+        if feature_type:
+            query += " AND t.type = ?"
+            params.append(feature_type)
+        return self.conn.execute(query, params).fetchall()
+
+    def shops_in_bbox(self, min_lon, min_lat, max_lon, max_lat, kind=None):
+        query = """SELECT s.* FROM shops_rtree r JOIN shops s ON s.id = r.id
+                   WHERE r.min_lon >= ? AND r.max_lon <= ? AND r.min_lat >= ? AND r.max_lat <= ?"""
+        params = [min_lon, max_lon, min_lat, max_lat]
+        if kind:
+            query += " AND s.kind = ?"
+            params.append(kind)
+        return self.conn.execute(query, params).fetchall()
+
+    def events_between(self, start, end, city=None):
+        """Events overlapping [start, end] (ISO strings), ordered by start."""
+        query = "SELECT * FROM events WHERE start <= ? AND end >= ?"
+        params = [end, start]
+        if city:
+            query += " AND city = ?"
+            params.append(city)
+        return self.conn.execute(query + " ORDER BY start", params).fetchall()
+
+    def stats(self):
+        return {table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("transport", "shops", "events")}
+
+
+def import_file(store, path, locations=None):
+    """Imports one pipeline export, detected by its name and columns. Returns (table, rows)."""
+    if path.endswith(".geojson"):
+        with open(path, "r", encoding="utf-8") as f:
+            features = json.load(f).get("features", [])
+        return "transport", store.upsert_transport(features, snapshot=os.path.basename(path))
+    if path.endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            return "events", store.upsert_events(json.loads(line) for line in f if line.strip())
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            return "events", store.upsert_events(json.load(f))
+    if path.endswith(".csv"):
+        with open(path, mode="r", newline="", encoding="utf-8") as infile:
+            reader = csv.DictReader(infile)
+            if "Kategorien" not in (reader.fieldnames or []):
+                raise ValueError(f"{path} is not a shop/restaurant CSV (transport exports: use the .geojson)")
+            kind = "gastronomy" if "Küchen" in reader.fieldnames else "shop"
+            return "shops", store.upsert_shops(reader, kind=kind, locations=locations)
+    raise ValueError(f"Unknown export format: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Unified SQLite store for transport, shops and events")
+    parser.add_argument("--db", default=DEFAULT_DB_FILE)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Upsert pipeline exports (.geojson, shop CSV, events JSON/JSONL)")
+    import_parser.add_argument("files", nargs="+")
+    import_parser.add_argument("--locations", nargs="*", default=[],
+                               help="Geocoded JSON lists (e.g. sb_shops.json) for shop coordinates")
+
+    bbox_parser = subparsers.add_parser("bbox", help="Transport features and shops inside a bounding box")
+    bbox_parser.add_argument("min_lon", type=float)
+    bbox_parser.add_argument("min_lat", type=float)
+    bbox_parser.add_argument("max_lon", type=float)
+    bbox_parser.add_argument("max_lat", type=float)
+    bbox_parser.add_argument("--type", default=None, help="Transport type, e.g. Bushaltestelle")
+
+    events_parser = subparsers.add_parser("events", help="Events overlapping a time range")
+    events_parser.add_argument("start", help="ISO start, e.g. 2025-06-01T00:00")
+    events_parser.add_argument("end", help="ISO end, e.g. 2025-06-07T23:59")
+    events_parser.add_argument("--city", default=None)
+
+    subparsers.add_parser("stats", help="Row counts per table")
+    args = parser.parse_args()
+
+    store = DataStore(args.db)
+    try:
+        if args.command == "import":
+            locations = {}
+            for path in args.locations:
+                locations.update(load_locations(path))
+            for path in args.files:
+                table, count = import_file(store, path, locations)
+                print(f"Upserted {count} rows into {table} from {path}")
+        elif args.command == "bbox":
+            for row in store.transport_in_bbox(args.min_lon, args.min_lat, args.max_lon, args.max_lat, args.type):
+                print(f"{row['type']}: {row['name'] or '-'} ({row['lon']:.6f}, {row['lat']:.6f})")
+            if not args.type:
+                for row in store.shops_in_bbox(args.min_lon, args.min_lat, args.max_lon, args.max_lat):
+                    print(f"{row['kind']}: {row['name']} ({row['lon']:.6f}, {row['lat']:.6f})")
+        elif args.command == "events":
+            for row in store.events_between(args.start, args.end, args.city):
+                print(f"{row['start']}  {row['name']}  [{row['art'] or '-'}]")
+        if args.command in ("import", "stats"):
+            print(json.dumps(store.stats()))
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
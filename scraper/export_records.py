@@ -0,0 +1,194 @@
+import argparse
+import csv
+import json
+import os
+
+from scraper import parse_opening_hours
+
+NULL_VALUES = {"", "null", "NULL", "N/A"}
+
+# CSV column -> (record field, type). "list" columns are comma-joined in the CSV.
+SHOP_FIELDS = [
+    ("Name", "name", "str"),
+    ("Kategorien", "categories", "list"),
+    ("Adresse", "address", "str"),
+    ("Kontaktinformationen", "phone", "str"),
+    ("Öffnungszeiten", "openingHours", "hours"),
+    ("Website URL", "website", "str"),
+    ("Beschreibung", "description", "str"),
+    ("Image Source URLs", "imageUrls", "list"),
+    ("Image Local Paths", "imagePaths", "list"),
+]
+GASTRONOMY_FIELDS = SHOP_FIELDS + [
+    ("Ernährungsformen", "diets", "list"),
+    ("Küchen", "cuisines", "list"),
+    ("Mehr", "features", "list"),
+    ("Zahlungsarten", "paymentMethods", "list"),
+]
+
+
+def clean_value(value):
+    if value is None or value.strip() in NULL_VALUES:
+        return None
+    return value.strip()
+
+
+def split_list(value):
+    value = clean_value(value)
+    if value is None:
+        return []
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def parse_hours_cell(value):
+    """Returns the opening hours as a dict, parsing raw scraped text if it is not JSON yet."""
+    value = clean_value(value) or "null"
+    try:
+        hours = json.loads(value)
+    except json.JSONDecodeError:
+        hours = json.loads(parse_opening_hours(value))
+    return hours if isinstance(hours, dict) else {}
+
+
+def load_locations(filepath):
+    """
+    Reads name -> [longitude, latitude] from a geocoded JSON list such as the assistant's
+    sb_shops.json ({"name": ..., "location": {"latitude": ..., "longitude": ...}}).
+    """
+    with open(filepath, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    locations = {}
+    for entry in entries:
+        loc = entry.get("location") or {}
+        lat, lon = loc.get("latitude"), loc.get("longitude")
+        if entry.get("name") and isinstance(lat, (int, float)) and isinstance(lon, (int, float)):
+            locations[entry["name"]] = [lon, lat]
+    return locations
+
+
+def iter_records(csv_filepath, kind=None, locations=None):
+    """
+    Yields typed records from a scraped shop or restaurant CSV.
+    The record layout matches the assistant's Shop/Gastronomy models, so they can be
+    bulk inserted without reshaping. `kind` is detected from the columns if not given.
+    """
+    locations = locations or {}
+    with open(csv_filepath, mode="r", newline="", encoding="utf-8") as infile:
+        reader = csv.DictReader(infile)
+        columns = reader.fieldnames or []
+        if kind is None:
+            kind = "gastronomy" if "Küchen" in columns else "shop"
+        fields = GASTRONOMY_FIELDS if kind == "gastronomy" else SHOP_FIELDS
+
+        for row in reader:
+            record = {"kind": kind}
+            for column, field, field_type in fields:
+                if column not in columns:
+                    continue
+                value = row.get(column)
+                if field_type == "list":
+                    record[field] = split_list(value)
+                elif field_type == "hours":
+                    record[field] = parse_hours_cell(value)
+                else:
+                    record[field] = clean_value(value)
+            if kind == "gastronomy":
+                record["contactDetails"] = {"phone": record.pop("phone", None)}
+            if not record.get("name"):
+                continue
+            coordinates = locations.get(record["name"])
+            if coordinates:
+                record["location"] = {"type": "Point", "coordinates": coordinates}
+            yield record
+
+
+class RecordWriter:
+    """Writes records as newline-delimited JSON or, if msgpack is installed, as a MessagePack stream."""
+
+    def __init__(self, filepath, fmt="ndjson"):
+        self.filepath = filepath
+        self.fmt = fmt
+        if fmt == "msgpack":
+            try:
+                import msgpack
+            except ImportError:
+                raise RuntimeError("MessagePack export requires the msgpack package (pip install msgpack)")
+            self._packer = msgpack.Packer(use_bin_type=True)
+            self._file = open(filepath, "wb")
+        else:
+            self._file = open(filepath, "w", encoding="utf-8", newline="\n")
+
+    def write(self, record):
+        if self.fmt == "msgpack":
+            self._file.write(self._packer.pack(record))
+        else:
+            self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+            self._file.write("\n")
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def export_records(csv_filepaths, output_filepath, fmt="ndjson", locations_filepaths=None):
+    """
+    Exports one or more scraped CSVs into a single record stream plus an inverted
+    category index (category -> list of record ids) next to it as <output>.index.json.
+    Record ids are the 0-based position in the stream. Only records with a location are
+    indexed, since the importer skips the others.
+    """
+    locations = {}
+    for locations_filepath in locations_filepaths or []:
+        locations.update(load_locations(locations_filepath))
+    category_index = {}
+    kind_counts = {}
+    record_id = 0
+    indexed = 0
+    tmp_path = output_filepath + ".part"
+
+    with RecordWriter(tmp_path, fmt) as writer:
+        for csv_filepath in csv_filepaths:
+            for record in iter_records(csv_filepath, locations=locations):
+                record["id"] = record_id
+                writer.write(record)
+                if "location" in record:
+                    indexed += 1
+                    for category in record.get("categories", []):
+                        category_index.setdefault(category, []).append(record_id)
+                kind_counts[record["kind"]] = kind_counts.get(record["kind"], 0) + 1
+                record_id += 1
+    os.replace(tmp_path, output_filepath)
+
+    index_filepath = output_filepath + ".index.json"
+    with open(index_filepath, "w", encoding="utf-8") as f:
+        json.dump({
+            "records": record_id,
+            "indexed": indexed,
+            "format": fmt,
+            "kinds": kind_counts,
+            "categories": dict(sorted(category_index.items())),
+        }, f, ensure_ascii=False, separators=(",", ":"))
+
+    print(f"Exported {record_id} records ({kind_counts}) to {output_filepath}")
+    print(f"Category index with {len(category_index)} categories ({indexed} located records) written to {index_filepath}")
+    return record_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export scraped shops/restaurants as NDJSON or MessagePack")
+    parser.add_argument("csv_files", nargs="+", help="Scraped (or transformed) shop/restaurant CSV files")
+    parser.add_argument("--output", "-o", default="saarbruecken_records.ndjson", help="Output file")
+    parser.add_argument("--format", "-f", choices=["ndjson", "msgpack"], default="ndjson")
+    parser.add_argument("--locations", "-l", nargs="+",
+                        help="Geocoded JSON files (e.g. sb_shops.json sb_gastro.json) to take coordinates from")
+    args = parser.parse_args()
+    export_records(args.csv_files, args.output, args.format, args.locations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import csv
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+
+from scraper import OUTPUT_CSV_FILE, OUTPUT_IMAGE_DIR
+
+MANIFEST_FILE = "manifest.json"
+MAX_DOWNLOAD_WORKERS = 8
+THUMBNAIL_SIZES = {"thumb": 320, "medium": 960}
+
+_thread_local = threading.local()
+
+
+def get_session():
+    """Returns a requests session that is private to the calling thread."""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _thread_local.session = session
+    return session
+
+
+def split_image_urls(value):
+    """Splits the comma-joined 'Image Source URLs' cell into a list of URLs."""
+    if not value or value.lower() == "null" or value == "N/A":
+        return []
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+def load_manifest(image_dir):
+    """Loads the url -> image manifest of a previous (possibly partial) run."""
+    manifest_path = os.path.join(image_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Could not read manifest {manifest_path}, starting fresh: {e}")
+        return {}
+
+
+def save_manifest(image_dir, manifest):
+    """Writes the manifest atomically so an interrupted run never corrupts it."""
+    manifest_path = os.path.join(image_dir, MANIFEST_FILE)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+
+def original_path_for(image_dir, digest, url):
+    """Content-addressed path of an original image, e.g. originals/ab/abcdef....jpg"""
+    ext = os.path.splitext(urlparse(url).path)[1].lower() or ".jpg"
+    return os.path.join(image_dir, "originals", digest[:2], digest + ext)
+
+
+def download_image(url, image_dir):
+    """
+    Downloads a single image and stores it under its SHA-256 content hash.
+    Identical images behind different URLs end up in the same file.
+    """
+    try:
+        response = get_session().get(url, timeout=30)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        print(f"Error downloading {url}: {e}")
+        return url, None
+
+    content = response.content
+    digest = hashlib.sha256(content).hexdigest()
+    path = original_path_for(image_dir, digest, url)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.part"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    return url, {"sha256": digest, "path": os.path.relpath(path, image_dir), "variants": {}}
+
+
+def make_variants(original_path, image_dir, digest, sizes=None):
+    """
+    Creates resized WebP variants of one original. Runs inside a worker process.
+    Returns a dict variant name -> path relative to image_dir.
+    """
+    from PIL import Image
+
+    sizes = sizes or THUMBNAIL_SIZES
+    variants = {}
+    with Image.open(original_path) as img:
+        img = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        for variant_name, max_side in sizes.items():
+            out_path = os.path.join(image_dir, variant_name, digest[:2], f"{digest}.webp")
+            if not os.path.exists(out_path):
+                os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                resized = img.copy()
+                resized.thumbnail((max_side, max_side))
+                tmp_path = out_path + ".part"
+                resized.save(tmp_path, "WEBP", quality=80, method=4)
+                os.replace(tmp_path, out_path)
+            variants[variant_name] = os.path.relpath(out_path, image_dir)
+    return digest, variants
+
+
+def generate_variants(manifest, image_dir, max_workers=None):
+    """Builds missing WebP variants for all downloaded originals in a process pool."""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("Pillow is not installed, skipping thumbnail/WebP generation (pip install Pillow).")
+        return
+
+    pending = {}
+    for entry in manifest.values():
+        if entry and set(entry.get("variants", {})) != set(THUMBNAIL_SIZES):
+            pending.setdefault(entry["sha256"], entry["path"])
+    if not pending:
+        return
+
+    print(f"Generating variants for {len(pending)} images...")
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(make_variants, os.path.join(image_dir, rel_path), image_dir, digest)
+            for digest, rel_path in pending.items()
+        ]
+        for future in as_completed(futures):
+            try:
+                digest, variants = future.result()
+                results[digest] = variants
+            except Exception as e:
+                print(f"Could not create variants: {e}")
+
+    for entry in manifest.values():
+        if entry and entry["sha256"] in results:
+            entry["variants"] = results[entry["sha256"]]
+
+
+def mirror_images(input_filepath=OUTPUT_CSV_FILE, output_filepath=None, image_dir=OUTPUT_IMAGE_DIR,
+                  max_workers=MAX_DOWNLOAD_WORKERS, make_thumbnails=True):
+    """
+    Mirrors all gallery images referenced in a shop/restaurant CSV:
+    - downloads every URL from 'Image Source URLs' concurrently
+    - de-duplicates files by content hash
+    - resumes from the manifest of a previous run (already mirrored URLs are skipped)
+    - generates resized WebP variants in a process pool (requires Pillow)
+    - writes a copy of the CSV with 'Image Local Paths' and 'Image Thumbnail Paths' columns
+    """
+    if output_filepath is None:
+        root, ext = os.path.splitext(input_filepath)
+        output_filepath = f"{root}_images{ext or '.csv'}"
+    if os.path.abspath(output_filepath) == os.path.abspath(input_filepath):
+        print(f"Error: output {output_filepath} would overwrite the input CSV.")
+        return
+    os.makedirs(image_dir, exist_ok=True)
+
+    with open(input_filepath, mode="r", newline="", encoding="utf-8") as infile:
+        reader = csv.DictReader(infile)
+        fieldnames = reader.fieldnames
+        rows = list(reader)
+    if not fieldnames or "Image Source URLs" not in fieldnames:
+        print(f"No 'Image Source URLs' column in {input_filepath}.")
+        return
+
+    manifest = load_manifest(image_dir)
+    # dict keeps the first-seen order of the URLs
+    all_urls = list(dict.fromkeys(
+        url for row in rows for url in split_image_urls(row.get("Image Source URLs"))
+    ))
+
+    todo = [
+        url for url in all_urls
+        if not manifest.get(url) or not os.path.exists(os.path.join(image_dir, manifest[url]["path"]))
+    ]
+    print(f"{len(all_urls)} unique image URLs, {len(all_urls) - len(todo)} already mirrored, {len(todo)} to download.")
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(download_image, url, image_dir) for url in todo]
+        for future in as_completed(futures):
+            url, entry = future.result()
+            if entry:
+                manifest[url] = entry
+            done += 1
+            if done % 50 == 0:
+                save_manifest(image_dir, manifest)
+                print(f"  {done}/{len(todo)} downloaded")
+    save_manifest(image_dir, manifest)
+
+    if make_thumbnails:
+        generate_variants(manifest, image_dir)
+        save_manifest(image_dir, manifest)
+
+    unique_files = len({entry["sha256"] for entry in manifest.values() if entry})
+    print(f"{unique_files} unique image files for {len(manifest)} URLs in {image_dir}")
+
+    out_fieldnames = list(fieldnames)
+    for column in ("Image Local Paths", "Image Thumbnail Paths"):
+        if column not in out_fieldnames:
+            out_fieldnames.append(column)
+
+    with open(output_filepath, mode="w", newline="", encoding="utf-8") as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=out_fieldnames)
+        writer.writeheader()
+        for row in rows:
+            local_paths, thumb_paths = [], []
+            for url in split_image_urls(row.get("Image Source URLs")):
+                entry = manifest.get(url)
+                if not entry:
+                    continue
+                local_paths.append(os.path.join(image_dir, entry["path"]).replace(os.sep, "/"))
+                thumb = entry.get("variants", {}).get("thumb")
+                if thumb:
+                    thumb_paths.append(os.path.join(image_dir, thumb).replace(os.sep, "/"))
+            row["Image Local Paths"] = ", ".join(local_paths) if local_paths else "null"
+            row["Image Thumbnail Paths"] = ", ".join(thumb_paths) if thumb_paths else "null"
+            writer.writerow(row)
+    print(f"Successfully wrote records with local image paths to {output_filepath}")
+
+
+if __name__ == "__main__":
+    input_csv = input(f"Enter the CSV file whose images should be mirrored (default: {OUTPUT_CSV_FILE}): ").strip()
+    mirror_images(input_csv or OUTPUT_CSV_FILE)
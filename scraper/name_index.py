@@ -0,0 +1,192 @@
+import argparse
+import csv
+import gzip
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from array import array
+
+EVENTS_SCRAPING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "events-scraping")
+sys.path.append(EVENTS_SCRAPING_DIR)
+from event_index import latest_events_file
+
+DEFAULT_SHOPS_CSV = "saarbruecken_shops_transformed.csv"
+DEFAULT_RESTAURANTS_CSV = "saarbruecken_restaurants.csv"
+DEFAULT_EVENTS_DIR = os.path.join(EVENTS_SCRAPING_DIR, "scraped_data")
+DEFAULT_INDEX_FILE = "name_index.json.gz"
+
+_NON_ALNUM_RE = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name):
+    """Lowercases, folds umlauts/accents (ü -> ue, é -> e) and collapses punctuation to spaces."""
+    name = name.lower().replace("ä", "ae").replace("ö", "oe").replace("ü", "ue").replace("ß", "ss")
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM_RE.sub(" ", name).strip()
+
+
+def trigrams(name):
+    """Returns the set of character trigrams of a normalized name, padded at word boundaries."""
+    padded = f"  {normalize_name(name)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """
+    Character-trigram inverted index over place and event names.
+
+    Every name is split into trigrams; each trigram maps to the sorted ids of the names that
+    contain it. A query only touches the postings of its own trigrams and ranks candidates by
+    the Dice coefficient 2 * shared / (|query| + |candidate|), so "Brauhaus Stiefel" still finds
+    "Brauhaus zum Stiefel" without comparing against every name.
+    """
+
+    def __init__(self):
+        self.entries = []  # [name, source]
+        self.sizes = array("H")
+        self.postings = {}
+        self._seen = set()
+
+    def add(self, name, source):
+        key = (normalize_name(name), source)
+        if not key[0] or key in self._seen:
+            return
+        self._seen.add(key)
+        entry_id = len(self.entries)
+        grams = trigrams(name)
+        self.entries.append([name, source])
+        self.sizes.append(len(grams))
+        for gram in grams:
+            self.postings.setdefault(gram, array("I")).append(entry_id)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query, limit=5, min_score=0.3, source=None):
+        """Returns up to `limit` (score, name, source) tuples, best match first."""
+        grams = trigrams(query)
+        if not grams:
+            return []
+        shared = {}
+        for gram in grams:
+            for entry_id in self.postings.get(gram, ()):
+                shared[entry_id] = shared.get(entry_id, 0) + 1
+        results = []
+        n_query = len(grams)
+        for entry_id, count in shared.items():
+            score = 2.0 * count / (n_query + self.sizes[entry_id])
+            if score >= min_score:
+                name, entry_source = self.entries[entry_id]
+                if source is None or entry_source == source:
+                    results.append((round(score, 4), name, entry_source))
+        results.sort(key=lambda r: (-r[0], r[1]))
+        return results[:limit]
+
+    def best_match(self, query, min_score=0.5, source=None):
+        results = self.search(query, limit=1, min_score=min_score, source=source)
+        return results[0] if results else None
+
+    def save(self, filepath=DEFAULT_INDEX_FILE):
+        """
+        Writes the index gzip-compressed. Postings are stored delta-encoded, which keeps the
+        id lists small and compresses well.
+        """
+        postings = {}
+        for gram, ids in self.postings.items():
+            previous = 0
+            deltas = []
+            for entry_id in ids:
+                deltas.append(entry_id - previous)
+                previous = entry_id
+            postings[gram] = deltas
+        with gzip.open(filepath, "wt", encoding="utf-8") as f:
+            json.dump({"entries": self.entries, "sizes": list(self.sizes), "postings": postings},
+                      f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, filepath=DEFAULT_INDEX_FILE):
+        with gzip.open(filepath, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls()
+        index.entries = data["entries"]
+        index.sizes = array("H", data["sizes"])
+        for gram, deltas in data["postings"].items():
+            ids = array("I")
+            current = 0
+            for delta in deltas:
+                current += delta
+                ids.append(current)
+            index.postings[gram] = ids
+        index._seen = {(normalize_name(name), source) for name, source in index.entries}
+        return index
+
+
+def add_csv_names(index, csv_filepath, source):
+    with open(csv_filepath, mode="r", newline="", encoding="utf-8") as infile:
+        for row in csv.DictReader(infile):
+            name = (row.get("Name") or "").strip()
+            if name and name != "null":
+                index.add(name, source)
+
+
+def read_events(json_filepath):
+    """Reads an events dump: JSON Lines (.jsonl, the spider's output) or an older JSON array."""
+    with open(json_filepath, "r", encoding="utf-8") as f:
+        if json_filepath.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def add_event_names(index, json_filepath, source="event"):
+    for event in read_events(json_filepath):
+        if event.get("Name"):
+            index.add(event["Name"], source)
+
+
+def build_index(shops_csv=DEFAULT_SHOPS_CSV, restaurants_csv=DEFAULT_RESTAURANTS_CSV, events_json=None):
+    """Builds the name index over shops, restaurants and events; missing inputs are skipped."""
+    index = NameIndex()
+    events_json = events_json or latest_events_file(DEFAULT_EVENTS_DIR)
+    for path, loader, source in [
+        (shops_csv, add_csv_names, "shop"),
+        (restaurants_csv, add_csv_names, "gastronomy"),
+        (events_json, add_event_names, "event"),
+    ]:
+        if path and os.path.exists(path):
+            loader(index, path, source)
+        else:
+            print(f"Skipping {source} names, file not found: {path}")
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the trigram name index")
+    parser.add_argument("query", nargs="*", help="Names to look up (builds the index if none given)")
+    parser.add_argument("--shops", default=DEFAULT_SHOPS_CSV)
+    parser.add_argument("--restaurants", default=DEFAULT_RESTAURANTS_CSV)
+    parser.add_argument("--events", default=None, help="Events JSON Lines or JSON array (default: newest in events-scraping/scraped_data)")
+    parser.add_argument("--index", default=DEFAULT_INDEX_FILE)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    if not args.query:
+        index = build_index(args.shops, args.restaurants, args.events)
+        index.save(args.index)
+        print(f"Indexed {len(index)} names ({len(index.postings)} trigrams) into {args.index}")
+        return
+
+    index = NameIndex.load(args.index)
+    for query in args.query:
+        start = time.perf_counter()
+        results = index.search(query, limit=args.limit)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"{query!r} ({elapsed_ms:.3f} ms):")
+        for score, name, source in results:
+            print(f"  {score:.3f}  {name}  [{source}]")
+
+
+if __name__ == "__main__":
+    main()
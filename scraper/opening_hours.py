@@ -0,0 +1,202 @@
+import csv
+import json
+import re
+from datetime import datetime, timedelta
+
+DAYS_GERMAN = ["Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag"]
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+SLOTS_PER_WEEK = 7 * SLOTS_PER_DAY
+
+TIME_RANGE_RE = re.compile(r"(\d{1,2})(?:[:.](\d{2}))?\s*-\s*(\d{1,2})(?:[:.](\d{2}))?")
+
+
+def parse_day_intervals(value):
+    """
+    Parses one per-day value such as "08:30 - 18:30" or "10:00 - 14:00 und 15:00 - 18:00"
+    into a list of (start_minute, end_minute) tuples. "Geschlossen" and unparseable text yield [].
+    An end time at or before the start time (e.g. "18:00 - 02:00") runs past midnight.
+    """
+    if not value or value == "Geschlossen" or value.lower() == "null":
+        return []
+    intervals = []
+    for match in TIME_RANGE_RE.finditer(value):
+        start_h, start_m, end_h, end_m = match.groups()
+        start = int(start_h) * 60 + int(start_m or 0)
+        end = int(end_h) * 60 + int(end_m or 0)
+        if start > 24 * 60 or end > 24 * 60:
+            continue
+        if end <= start:
+            end += 24 * 60
+        intervals.append((start, end))
+    return intervals
+
+
+def compile_week(hours):
+    """
+    Compiles a week of opening hours into a single 672-bit integer, one bit per quarter hour
+    starting Monday 00:00. `hours` is the dict (or JSON string) produced by parse_opening_hours.
+    Partially covered quarter hours count as open.
+    """
+    if isinstance(hours, str):
+        hours = json.loads(hours)
+    bits = 0
+    for day_idx, day in enumerate(DAYS_GERMAN):
+        for start, end in parse_day_intervals(hours.get(day, "")):
+            first = day_idx * SLOTS_PER_DAY + start // SLOT_MINUTES
+            last = day_idx * SLOTS_PER_DAY + -(-end // SLOT_MINUTES)  # ceil
+            for slot in range(first, last):
+                bits |= 1 << (slot % SLOTS_PER_WEEK)
+    return bits
+
+
+def slot_of(when):
+    """Returns the quarter-hour slot index of a datetime within the week."""
+    return when.weekday() * SLOTS_PER_DAY + (when.hour * 60 + when.minute) // SLOT_MINUTES
+
+
+class OpeningHoursStore:
+    """
+    Compiled opening hours for many places.
+
+    Besides one week bitset per place, the store keeps a transposed index: for every quarter-hour
+    slot a bitmask over all places that are open in it. "Which places are open at T" is then a
+    single lookup and "open for the next 2 hours" a bitwise AND of 8 (or 9) masks, independent of how
+    many shops and restaurants are loaded.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.weeks = []
+        self._slot_masks = None
+
+    def add(self, key, hours):
+        """Adds a place; `hours` is a parse_opening_hours dict/JSON string or a compiled week."""
+        week = hours if isinstance(hours, int) else compile_week(hours)
+        self.keys.append(key)
+        self.weeks.append(week)
+        self._slot_masks = None
+        return len(self.keys) - 1
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _build_slot_masks(self):
+        masks = [0] * SLOTS_PER_WEEK
+        for place_idx, week in enumerate(self.weeks):
+            place_bit = 1 << place_idx
+            while week:
+                low = week & -week
+                masks[low.bit_length() - 1] |= place_bit
+                week ^= low
+        self._slot_masks = masks
+
+    def open_mask(self, when, duration=None):
+        """Bitmask over places open at `when` (and, if given, for the whole `duration`)."""
+        if self._slot_masks is None:
+            self._build_slot_masks()
+        first = slot_of(when)
+        n_slots = 1
+        if duration and duration >= timedelta(weeks=1):
+            n_slots = SLOTS_PER_WEEK
+        elif duration and duration > timedelta(0):
+            # Last slot touched by the interval, counted from the minute `when` falls into,
+            # so that an unaligned start (e.g. 10:07 + 2h) also requires the 12:00 slot
+            last = slot_of(when + duration - timedelta(minutes=1))
+            n_slots = (last - first) % SLOTS_PER_WEEK + 1
+        mask = (1 << len(self.keys)) - 1
+        for offset in range(n_slots):
+            mask &= self._slot_masks[(first + offset) % SLOTS_PER_WEEK]
+            if not mask:
+                break
+        return mask
+
+    def _keys_from_mask(self, mask):
+        keys = []
+        while mask:
+            low = mask & -mask
+            keys.append(self.keys[low.bit_length() - 1])
+            mask ^= low
+        return keys
+
+    def open_at(self, when=None):
+        """Returns the keys of all places open at `when` (default: now)."""
+        return self._keys_from_mask(self.open_mask(when or datetime.now()))
+
+    def open_for(self, when=None, duration=timedelta(hours=2)):
+        """Returns the keys of all places open from `when` for at least `duration`."""
+        return self._keys_from_mask(self.open_mask(when or datetime.now(), duration))
+
+    def is_open(self, key, when=None):
+        week = self.weeks[self.keys.index(key)]
+        return bool(week >> slot_of(when or datetime.now()) & 1)
+
+    def intervals(self, key):
+        """Decodes a place's week back into (day, "HH:MM", "HH:MM") intervals."""
+        week = self.weeks[self.keys.index(key)]
+        result = []
+        slot = 0
+        while slot < SLOTS_PER_WEEK:
+            if week >> slot & 1:
+                start = slot
+                while slot < SLOTS_PER_WEEK and week >> slot & 1:
+                    slot += 1
+                day = DAYS_GERMAN[start // SLOTS_PER_DAY]
+                start_min = start % SLOTS_PER_DAY * SLOT_MINUTES
+                end_min = slot % SLOTS_PER_DAY * SLOT_MINUTES
+                result.append((day, f"{start_min // 60:02d}:{start_min % 60:02d}",
+                               f"{end_min // 60:02d}:{end_min % 60:02d}"))
+            else:
+                slot += 1
+        return result
+
+    def save(self, filepath):
+        """Stores the compiled weeks as hex bitsets (168 characters per place)."""
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump({
+                "slot_minutes": SLOT_MINUTES,
+                "keys": self.keys,
+                "weeks": [format(week, "x") for week in self.weeks],
+            }, f, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, filepath):
+        with open(filepath, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("slot_minutes") != SLOT_MINUTES:
+            raise ValueError(f"{filepath} was compiled with {data.get('slot_minutes')}-minute slots")
+        store = cls()
+        store.keys = data["keys"]
+        store.weeks = [int(week, 16) for week in data["weeks"]]
+        return store
+
+    @classmethod
+    def from_csv(cls, filepath, key_field="Name"):
+        """
+        Builds a store from a shop/restaurant CSV. 'Öffnungszeiten' cells that are not yet
+        structured JSON (raw scraped text) are run through parse_opening_hours first.
+        """
+        store = cls()
+        with open(filepath, mode="r", newline="", encoding="utf-8") as infile:
+            for row in csv.DictReader(infile):
+                raw = row.get("Öffnungszeiten") or "null"
+                try:
+                    hours = json.loads(raw)
+                except json.JSONDecodeError:
+                    from scraper import parse_opening_hours
+                    hours = json.loads(parse_opening_hours(raw))
+                if not isinstance(hours, dict):
+                    hours = {}
+                store.add(row.get(key_field, ""), hours)
+        return store
+
+
+if __name__ == "__main__":
+    import sys
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "saarbruecken_shops_transformed.csv"
+    store = OpeningHoursStore.from_csv(csv_path)
+    now = datetime.now()
+    open_now = store.open_at(now)
+    open_2h = store.open_for(now, timedelta(hours=2))
+    print(f"{len(store)} places compiled, {len(open_now)} open now, {len(open_2h)} open for the next 2 hours.")
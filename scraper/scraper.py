@@ -1,29 +1,39 @@
+import argparse
 import csv
+import sys
 import requests
 from bs4 import BeautifulSoup
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
 from urllib.parse import urljoin
 import json
 import re
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shared'))
+from profiling import add_profile_arguments, phase, profiled, profiler_from_args
+
 BASE_URL = "https://einkaufen.saarbruecken.de"
 OUTPUT_CSV_FILE = "saarbruecken_shops.csv"
-OUTPUT_IMAGE_DIR = "shop_images"
-
-# Create a directory for images if it doesn't exist
-if not os.path.exists(OUTPUT_IMAGE_DIR):
-    os.makedirs(OUTPUT_IMAGE_DIR)
+OUTPUT_IMAGE_DIR = "shop_images"  # Filled by image_mirror.mirror_images
+TRANSFORM_CHUNK_SIZE = 500
+OPENING_HOURS_CACHE_SIZE = 4096
 
 def get_soup(url):
     """Fetches a URL and returns a BeautifulSoup object."""
     try:
-        response = requests.get(url)
+        with phase("fetch"):
+            response = requests.get(url)
         response.raise_for_status()  # Raise an exception for HTTP errors
-        return BeautifulSoup(response.content, "html.parser")
+        with phase("parse"):
+            return BeautifulSoup(response.content, "html.parser")
     except requests.exceptions.RequestException as e:
         print(f"Error fetching {url}: {e}")
         return None
 
+@profiled("extract")
 def scrape_shop_details(shop_url):
     """Scrapes the details from an individual shop page."""
     print(f"Scraping details from: {shop_url}")
@@ -77,6 +87,7 @@ def scrape_shop_details(shop_url):
     details["Adresse"] = address
     details["Kontaktinformationen"] = phone
     details["Website URL"] = website_url
+    details["Detail URL"] = shop_url
     
     # Extract Öffnungszeiten
     opening_hours_str_for_parser = "null"
@@ -123,10 +134,12 @@ def scrape_shop_details(shop_url):
     
     return details
 
+@lru_cache(maxsize=OPENING_HOURS_CACHE_SIZE)
 def parse_opening_hours(hours_string):
     """
     Parses a free-form opening hours string and converts it to a structured JSON string.
     Returns a JSON string with all days "Geschlossen" if input is "null" or unparseable.
+    Results are memoized, most shops share a handful of identical hours strings.
     """
     if not hours_string or hours_string.lower() == "null" or hours_string == "N/A": # Added N/A for robustness
         return json.dumps({
@@ -209,50 +222,79 @@ def parse_opening_hours(hours_string):
 
     return json.dumps(days_map, ensure_ascii=False)
 
-def transform_csv_data(input_filepath="saarbruecken_shops.csv", output_filepath="saarbruecken_shops_transformed.csv"):
+def transform_rows(header, rows):
     """
-    Transforms the CSV data:
+    Transforms one chunk of CSV rows (lists of values):
     - Converts 'Öffnungszeiten' to a structured JSON string.
     - Replaces 'N/A' or 'NULL' with 'null' in other fields.
-    - Adds 'Sonstiges' column with 'null' if missing.
+    Runs in worker processes, so it must stay a module-level function.
+    """
+    # Use the original header, do not add/remove Sonstiges here explicitly
+    # The scraping part dictates the columns. This function just transforms existing ones.
+    hours_idx = header.index("Öffnungszeiten") if "Öffnungszeiten" in header else -1
+    transformed = []
+    for row_list in rows:
+        transformed_row = []
+        for i, value in enumerate(row_list):
+            if i == hours_idx:
+                transformed_row.append(parse_opening_hours(value))
+            elif value == "N/A" or value == "NULL":
+                transformed_row.append("null")
+            else:
+                transformed_row.append(value)
+        transformed.append(transformed_row)
+    return transformed
+
+def iter_chunks(reader, chunk_size):
+    """Yields lists of at most chunk_size rows from a csv reader."""
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+@profiled("transform")
+def transform_csv_data(input_filepath="saarbruecken_shops.csv", output_filepath="saarbruecken_shops_transformed.csv",
+                       workers=None, chunk_size=TRANSFORM_CHUNK_SIZE):
+    """
+    Transforms the CSV data (see transform_rows) as a stream:
+    rows are read in chunks, transformed in a process pool and written in input order
+    as soon as they are done. At most 2 * workers chunks are in flight, so memory stays
+    constant regardless of the input size. workers=1 transforms in-process.
     """
     print(f"Starting CSV transformation for {input_filepath}...")
-    
+    workers = workers or os.cpu_count() or 1
+    row_count = 0
+
     try:
-        rows_to_write = []
-        with open(input_filepath, mode='r', newline='', encoding='utf-8') as infile:
+        with open(input_filepath, mode='r', newline='', encoding='utf-8') as infile, \
+                open(output_filepath, mode='w', newline='', encoding='utf-8') as outfile:
             reader = csv.reader(infile)
             header = next(reader, None)
             if not header:
                 print("CSV is empty or header is missing.")
                 return
-            
-            # Use the original header, do not add/remove Sonstiges here explicitly
-            # If Sonstiges was in the old CSV, it will be processed like any other column for N/A -> null
-            # If it wasn't, it won't be added.
-            # The scraping part now dictates the columns. This function just transforms existing ones.
-            final_fieldnames = header
-            rows_to_write.append(final_fieldnames)
-
-            for row_list in reader:
-                transformed_row = []
-                for i, value in enumerate(row_list):
-                    # Ensure we don't try to access a fieldname out of bounds if row is shorter than header
-                    # (though this shouldn't happen with valid CSVs)
-                    current_field = final_fieldnames[i] if i < len(final_fieldnames) else None 
-                    
-                    if current_field == "Öffnungszeiten":
-                        transformed_row.append(parse_opening_hours(value))
-                    elif value == "N/A" or value == "NULL":
-                        transformed_row.append("null")
-                    else:
-                        transformed_row.append(value)
-                rows_to_write.append(transformed_row)
-        
-        with open(output_filepath, mode='w', newline='', encoding='utf-8') as outfile:
             writer = csv.writer(outfile)
-            writer.writerows(rows_to_write)
-        print(f"Successfully transformed data and saved to {output_filepath}")
+            writer.writerow(header)
+
+            if workers == 1:
+                for chunk in iter_chunks(reader, chunk_size):
+                    writer.writerows(transform_rows(header, chunk))
+                    row_count += len(chunk)
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    pending = deque()
+                    for chunk in iter_chunks(reader, chunk_size):
+                        pending.append(pool.submit(transform_rows, header, chunk))
+                        if len(pending) >= 2 * workers:
+                            done_rows = pending.popleft().result()
+                            writer.writerows(done_rows)
+                            row_count += len(done_rows)
+                    while pending:
+                        done_rows = pending.popleft().result()
+                        writer.writerows(done_rows)
+                        row_count += len(done_rows)
+        print(f"Successfully transformed {row_count} rows and saved to {output_filepath}")
 
     except FileNotFoundError:
         print(f"Error: Input file {input_filepath} not found.")
@@ -293,9 +335,9 @@ def scrape_all_shops():
     if all_shops_data:
         fieldnames = [
             "Name", "Kategorien", "Adresse", "Kontaktinformationen", 
-            "Öffnungszeiten", "Website URL", "Beschreibung", "Image Source URLs"
+            "Öffnungszeiten", "Website URL", "Beschreibung", "Image Source URLs", "Detail URL"
         ]
-        with open(OUTPUT_CSV_FILE, "w", newline="", encoding="utf-8") as csvfile:
+        with phase("export"), open(OUTPUT_CSV_FILE, "w", newline="", encoding="utf-8") as csvfile:
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
             writer.writeheader()
             for shop_row in all_shops_data:
@@ -307,26 +349,63 @@ def scrape_all_shops():
     else:
         print("No shop data was scraped. CSV file not created.")
 
-if __name__ == "__main__":
-    action = input("Do you want to 'scrape' new data or 'transform' an existing CSV? (scrape/transform): ").strip().lower()
-
-    if action == "scrape":
-        scrape_all_shops()
-        print("\nScraping complete. You might want to run the 'transform' option next if needed,")
-        print(f"or if you want to transform the newly scraped file ({OUTPUT_CSV_FILE}), run the script again and choose 'transform'.")
-    elif action == "transform":
-        input_csv = input(f"Enter the name of the CSV file to transform (default: {OUTPUT_CSV_FILE}): ").strip()
-        if not input_csv:
-            input_csv = OUTPUT_CSV_FILE
-        
-        default_output_name = input_csv.replace('.csv', '_transformed.csv')
-        if default_output_name == input_csv:
-            default_output_name = input_csv.replace('.csv', '_transformed_explicit.csv')
+def default_transform_output(input_csv):
+    """Derives the default output name for a transformed CSV."""
+    default_output_name = input_csv.replace('.csv', '_transformed.csv')
+    if default_output_name == input_csv:
+        default_output_name = input_csv.replace('.csv', '_transformed_explicit.csv')
+    return default_output_name
 
-        output_csv = input(f"Enter the name for the transformed output CSV (default: {default_output_name}): ").strip()
-        if not output_csv:
-            output_csv = default_output_name
+def main():
+    parser = argparse.ArgumentParser(description="Saarbrücken shop scraper")
+    parser.add_argument("action", nargs="?", choices=["scrape", "transform", "images"],
+                        help="Action to run. Without an action the script asks interactively.")
+    parser.add_argument("--input", "-i", help=f"Input CSV for transform/images (default: {OUTPUT_CSV_FILE})")
+    parser.add_argument("--output", "-o", help="Output CSV for transform/images")
+    parser.add_argument("--workers", "-w", type=int, default=None,
+                        help="Worker processes for transform (default: CPU count, 1 = no pool)")
+    parser.add_argument("--chunk-size", type=int, default=TRANSFORM_CHUNK_SIZE,
+                        help=f"Rows per transform chunk (default: {TRANSFORM_CHUNK_SIZE})")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
 
-        transform_csv_data(input_csv, output_csv)
-    else:
-        print("Invalid action. Please type 'scrape' or 'transform'.") 
\ No newline at end of file
+    action = args.action
+    interactive = action is None
+    if interactive:
+        action = input("Do you want to 'scrape' new data, 'transform' an existing CSV or mirror its 'images'? (scrape/transform/images): ").strip().lower()
+
+    # Phases: fetch (HTTP), parse (HTML), extract (shop fields), transform, export (CSV)
+    profiler = profiler_from_args(args, "scraper")
+    try:
+        if action == "scrape":
+            scrape_all_shops()
+            print("\nScraping complete. You might want to run the 'transform' option next if needed,")
+            print(f"or if you want to transform the newly scraped file ({OUTPUT_CSV_FILE}), run: python scraper.py transform")
+        elif action == "transform":
+            input_csv = args.input
+            if interactive and not input_csv:
+                input_csv = input(f"Enter the name of the CSV file to transform (default: {OUTPUT_CSV_FILE}): ").strip()
+            input_csv = input_csv or OUTPUT_CSV_FILE
+
+            default_output_name = default_transform_output(input_csv)
+            output_csv = args.output
+            if interactive and not output_csv:
+                output_csv = input(f"Enter the name for the transformed output CSV (default: {default_output_name}): ").strip()
+            output_csv = output_csv or default_output_name
+
+            transform_csv_data(input_csv, output_csv, workers=args.workers, chunk_size=args.chunk_size)
+        elif action == "images":
+            from image_mirror import mirror_images
+
+            input_csv = args.input
+            if interactive and not input_csv:
+                input_csv = input(f"Enter the name of the CSV file whose images should be mirrored (default: {OUTPUT_CSV_FILE}): ").strip()
+            mirror_images(input_csv or OUTPUT_CSV_FILE, args.output)
+        else:
+            print("Invalid action. Please type 'scrape', 'transform' or 'images'.")
+    finally:
+        if profiler:
+            profiler.stop()
+
+if __name__ == "__main__":
+    main()
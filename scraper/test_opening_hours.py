@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from opening_hours import OpeningHoursStore
+
+# 2024-01-01 is a Monday
+MONDAY = datetime(2024, 1, 1)
+
+
+def make_store():
+    store = OpeningHoursStore()
+    store.add("morning", {"Montag": "08:00 - 12:00"})
+    store.add("late", {"Sonntag": "22:00 - 24:00", "Montag": "00:00 - 01:00"})
+    return store
+
+
+def test_open_for_aligned_start():
+    store = make_store()
+    assert store.open_for(MONDAY.replace(hour=10), timedelta(hours=2)) == ["morning"]
+
+
+def test_open_for_unaligned_start_requires_the_last_partial_slot():
+    store = make_store()
+    # Closes at 12:00, so it is not open for two hours from 10:07
+    assert store.open_for(MONDAY.replace(hour=10, minute=7), timedelta(hours=2)) == []
+    assert store.open_for(MONDAY.replace(hour=10, minute=7), timedelta(minutes=113)) == ["morning"]
+
+
+def test_open_for_wraps_around_the_week():
+    store = make_store()
+    sunday_night = datetime(2024, 1, 7, 23, 10)
+    assert store.open_for(sunday_night, timedelta(hours=1)) == ["late"]
+    assert store.open_for(sunday_night, timedelta(hours=2)) == []
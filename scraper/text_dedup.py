@@ -0,0 +1,172 @@
+import argparse
+import csv
+import json
+import os
+import random
+import time
+import zlib
+from collections import Counter
+
+from name_index import (DEFAULT_EVENTS_DIR, DEFAULT_RESTAURANTS_CSV, DEFAULT_SHOPS_CSV, latest_events_file,
+                        normalize_name, read_events)
+
+DEFAULT_OUTPUT_FILE = "descriptions_dedup.json"
+NUM_PERM = 128
+BANDS = 16  # 16 bands x 8 rows: pairs above ~0.7 Jaccard become candidates
+SHINGLE_WORDS = 3
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    """Returns the crc32 hashes of the word n-grams of a normalized text."""
+    words = normalize_name(text).split()
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("ascii"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("ascii")) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures from NUM_PERM universal hash functions (a * x + b) mod p."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = random.Random(seed)
+        self.params = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+
+    def signature(self, hashes):
+        if not hashes:
+            return None
+        return tuple(min((a * x + b) % _MERSENNE_PRIME for x in hashes) for a, b in self.params)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity: the share of signature positions that agree."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def find_clusters(texts, threshold=0.8, num_perm=NUM_PERM, bands=BANDS):
+    """
+    Groups near-duplicate texts and returns one cluster id per text.
+
+    Identical texts are hashed once. Signatures are cut into `bands` bands; texts sharing a
+    band bucket become candidate pairs, so the work grows with the number of texts instead of
+    the number of pairs. Every candidate pair is joined (union-find) if its estimated
+    similarity is at least `threshold`. Cluster ids are numbered in order of first appearance.
+    """
+    distinct = list(dict.fromkeys(texts))
+    hasher = MinHasher(num_perm)
+    signatures = [hasher.signature(shingles(text)) for text in distinct]
+
+    parent = list(range(len(distinct)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows = num_perm // bands
+    for band in range(bands):
+        buckets = {}
+        for i, signature in enumerate(signatures):
+            if signature is not None:
+                key = signature[band * rows:(band + 1) * rows]
+                buckets.setdefault(key, []).append(i)
+        # Buckets are small, so every pair in a bucket is verified
+        for members in buckets.values():
+            for pos, a in enumerate(members):
+                for b in members[pos + 1:]:
+                    root_a, root_b = find(a), find(b)
+                    if root_a != root_b and similarity(signatures[a], signatures[b]) >= threshold:
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    cluster_of_root = {}
+    text_cluster = {}
+    for i, text in enumerate(distinct):
+        text_cluster[text] = cluster_of_root.setdefault(find(i), len(cluster_of_root))
+    return [text_cluster[text] for text in texts]
+
+
+def canonical_texts(texts, cluster_ids):
+    """Picks the most frequent text of every cluster (the longest one on ties)."""
+    counts = Counter(zip(cluster_ids, texts))
+    best = {}
+    for (cluster_id, text), count in counts.items():
+        key = (count, len(text))
+        if cluster_id not in best or key > best[cluster_id][0]:
+            best[cluster_id] = (key, text)
+    return {cluster_id: text for cluster_id, (_, text) in best.items()}
+
+
+def has_text(text):
+    return bool(text) and text.lower() != "null"
+
+
+def read_csv_descriptions(csv_filepath, source):
+    with open(csv_filepath, mode="r", newline="", encoding="utf-8") as infile:
+        for row in csv.DictReader(infile):
+            yield source, row.get("Name") or "", (row.get("Beschreibung") or "").strip()
+
+
+def read_event_descriptions(json_filepath, source="event"):
+    for event in read_events(json_filepath):
+        yield source, event.get("Name") or "", (event.get("Beschreibung") or "").strip()
+
+
+def dedup_descriptions(shops_csv=DEFAULT_SHOPS_CSV, restaurants_csv=DEFAULT_RESTAURANTS_CSV, events_json=None,
+                       threshold=0.8):
+    """
+    Clusters the descriptions of shops, restaurants and events; missing inputs are skipped.
+    Returns {"clusters": [{id, size, canonical}], "records": [[source, name, cluster id]]}.
+    Records without a description get cluster id None.
+    """
+    events_json = events_json or latest_events_file(DEFAULT_EVENTS_DIR)
+    records = []
+    for path, reader, source in [
+        (shops_csv, read_csv_descriptions, "shop"),
+        (restaurants_csv, read_csv_descriptions, "gastronomy"),
+        (events_json, read_event_descriptions, "event"),
+    ]:
+        if path and os.path.exists(path):
+            records.extend(reader(path, source))
+        else:
+            print(f"Skipping {source} descriptions, file not found: {path}")
+
+    texts = [text for _, _, text in records if has_text(text)]
+    cluster_ids = iter(find_clusters(texts, threshold=threshold))
+    assignments = []
+    for source, name, text in records:
+        cluster_id = next(cluster_ids) if has_text(text) else None
+        assignments.append([source, name, cluster_id])
+
+    sizes = Counter(cluster_id for _, _, cluster_id in assignments if cluster_id is not None)
+    canonical = canonical_texts(texts, [a[2] for a in assignments if a[2] is not None])
+    clusters = [{"id": cluster_id, "size": sizes[cluster_id], "canonical": canonical[cluster_id]}
+                for cluster_id in sorted(canonical)]
+    return {"clusters": clusters, "records": assignments}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster near-duplicate descriptions (MinHash LSH)")
+    parser.add_argument("--shops", default=DEFAULT_SHOPS_CSV)
+    parser.add_argument("--restaurants", default=DEFAULT_RESTAURANTS_CSV)
+    parser.add_argument("--events", default=None, help="Events JSON/JSONL (default: newest in events-scraping/scraped_data)")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Minimum estimated Jaccard similarity")
+    parser.add_argument("--output", "-o", default=DEFAULT_OUTPUT_FILE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = dedup_descriptions(args.shops, args.restaurants, args.events, args.threshold)
+    elapsed = time.perf_counter() - start
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, separators=(",", ":"))
+
+    records = [r for r in result["records"] if r[2] is not None]
+    total_chars = sum(len(c["canonical"]) * c["size"] for c in result["clusters"])
+    canonical_chars = sum(len(c["canonical"]) for c in result["clusters"])
+    print(f"{len(records)} descriptions -> {len(result['clusters'])} clusters in {elapsed:.2f}s "
+          f"(~{total_chars} -> {canonical_chars} characters): {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Phase profiler shared by getTransport.py, scraper/scraper.py and the events spider.
+
+This is the only copy. The importing modules put this directory on sys.path first:
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'shared'))
+
+Usage:
+    profiler = start_profiler('getTransport', 'profiles')
+    with phase('fetch'):
+        ...
+    profiler.stop()
+
+phase() and profiled() are no-ops while no profiler is running, so instrumented code costs
+nothing in normal runs. Phases are exclusive: time and memory spent in a nested phase are
+charged to the inner phase only. Work outside any phase is charged to `default_phase`.
+
+The default mode is cheap enough for production runs: a sampling thread records the stack and
+the resident set size (RSS, Linux) of the process. tracemalloc gives exact Python heap peaks but
+slows allocation-heavy code down several times, so it is opt-in.
+
+Outputs in the profile directory, prefixed <name>_<timestamp>:
+    .collapsed        wall-clock stack samples of the profiled thread in collapsed format
+                      ("phase;frame;frame count"), readable by flamegraph.pl and speedscope;
+                      counts are sampling intervals, so a stall of the sampler (e.g. while a
+                      C call holds the GIL) is charged with its full duration
+    .phases.json      calls, wall/CPU seconds, samples and peak RSS / tracemalloc peak per phase
+    .<phase>.prof     with cprofile=True: cProfile stats per phase (pstats / snakeviz)
+"""
+import cProfile
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+MAX_STACK_DEPTH = 128
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+_active = None
+
+
+class Profiler:
+    """
+    Samples the stack of the starting thread and the process RSS every `interval` seconds
+    (no tracing overhead), optionally tracks exact Python heap peaks with tracemalloc and runs
+    cProfile per phase. Only the thread that calls start() is sampled and timed; worker
+    processes are not profiled.
+    """
+
+    def __init__(self, name, output_dir='profiles', interval=0.01, cprofile=False, trace_memory=False,
+                 default_phase='other'):
+        self.name = name
+        self.output_dir = output_dir
+        self.interval = interval
+        self.cprofile = cprofile
+        self.trace_memory = trace_memory
+        self.default_phase = default_phase
+        self._stack = []
+        self._stats = {}
+        self._profiles = {}
+        self._samples = {}
+        # Written only by the sampler thread, merged into _stats in stop()
+        self._sampled_rss = {}
+        self._thread_id = None
+        self._sampler = None
+        self._stopped = threading.Event()
+
+    def _phase_stats(self, name):
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'peak_rss': None, 'peak_traced': 0}
+        return stats
+
+    def _current(self):
+        return self._stack[-1] if self._stack else self.default_phase
+
+    def _switch(self):
+        """Charges everything since the last transition to the current phase."""
+        now_wall, now_cpu = time.perf_counter(), time.thread_time()
+        stats = self._phase_stats(self._current())
+        stats['wall'] += now_wall - self._mark_wall
+        stats['cpu'] += now_cpu - self._mark_cpu
+        rss = _current_rss()
+        if rss is not None:
+            stats['peak_rss'] = max(stats['peak_rss'] or 0, rss)
+        if self.trace_memory:
+            stats['peak_traced'] = max(stats['peak_traced'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        if self.cprofile:
+            self._profiles[self._current()].disable()
+        self._mark_wall, self._mark_cpu = now_wall, now_cpu
+
+    def _resume(self):
+        if self.cprofile:
+            self._profiles.setdefault(self._current(), cProfile.Profile()).enable()
+
+    def start(self):
+        global _active
+        if _active is not None:
+            raise RuntimeError(f"Profiler {_active.name} is already running")
+        if self.trace_memory:
+            tracemalloc.start(1)
+        self._started = datetime.now()
+        self._mark_wall, self._mark_cpu = time.perf_counter(), time.thread_time()
+        self._thread_id = threading.get_ident()
+        self._sampler = threading.Thread(target=self._sample_loop, name='profiler-sampler', daemon=True)
+        self._sampler.start()
+        _active = self
+        self._resume()
+        return self
+
+    @contextmanager
+    def phase(self, name):
+        if threading.get_ident() != self._thread_id:
+            yield
+            return
+        self._switch()
+        self._stack.append(name)
+        self._phase_stats(name)['calls'] += 1
+        self._resume()
+        try:
+            yield
+        finally:
+            self._switch()
+            self._stack.pop()
+            self._resume()
+
+    def _sample_loop(self):
+        last = time.perf_counter()
+        while not self._stopped.wait(self.interval):
+            now = time.perf_counter()
+            weight = max(1, round((now - last) / self.interval))
+            last = now
+            current = self._current()
+            rss = _current_rss()
+            if rss is not None:
+                self._sampled_rss[current] = max(self._sampled_rss.get(current, 0), rss)
+            frame = sys._current_frames().get(self._thread_id)
+            frames = []
+            while frame is not None and len(frames) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            del frame
+            if not frames:
+                continue
+            key = current + ';' + ';'.join(reversed(frames))
+            self._samples[key] = self._samples.get(key, 0) + weight
+
+    def stop(self):
+        """Stops sampling, writes the output files and prints the per-phase table."""
+        global _active
+        self._switch()
+        self._stopped.set()
+        self._sampler.join()
+        if self.trace_memory:
+            tracemalloc.stop()
+        _active = None
+        for name, rss in self._sampled_rss.items():
+            stats = self._phase_stats(name)
+            stats['peak_rss'] = max(stats['peak_rss'] or 0, rss)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, f"{self.name}_{self._started.strftime('%Y%m%d_%H%M%S')}")
+        with open(prefix + '.collapsed', 'w', encoding='utf-8') as f:
+            for key, count in sorted(self._samples.items()):
+                f.write(f"{key} {count}\n")
+
+        samples = {}
+        for key, count in self._samples.items():
+            phase_name = key.split(';', 1)[0]
+            samples[phase_name] = samples.get(phase_name, 0) + count
+        report = {
+            'name': self.name,
+            'started': self._started.isoformat(),
+            'interval_seconds': self.interval,
+            'wall_seconds': round(sum(s['wall'] for s in self._stats.values()), 3),
+            'max_rss_mb': _mb(_max_rss_bytes()) if resource else None,
+            'phases': {name: {'calls': s['calls'], 'wall_seconds': round(s['wall'], 3),
+                              'cpu_seconds': round(s['cpu'], 3), 'samples': samples.get(name, 0),
+                              'peak_rss_mb': _mb(s['peak_rss']),
+                              'peak_traced_mb': _mb(s['peak_traced']) if self.trace_memory else None}
+                       for name, s in sorted(self._stats.items(), key=lambda item: -item[1]['wall'])},
+        }
+        with open(prefix + '.phases.json', 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        for name, profile in self._profiles.items():
+            profile.dump_stats(f"{prefix}.{name}.prof")
+
+        print(format_phase_table(report))
+        print(f"Profile written to {prefix}.collapsed / .phases.json")
+        return report
+
+
+def _mb(value):
+    return round(value / 2 ** 20, 1) if value is not None else None
+
+
+def _current_rss():
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _max_rss_bytes():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def format_phase_table(report):
+    def column(value):
+        return f"{value:.1f}" if value is not None else '-'
+
+    lines = [f"{'phase':<14} {'calls':>7} {'wall s':>9} {'cpu s':>9} {'samples':>8} {'RSS MB':>8} {'heap MB':>8}"]
+    for name, p in report['phases'].items():
+        lines.append(f"{name:<14} {p['calls']:>7} {p['wall_seconds']:>9.3f} {p['cpu_seconds']:>9.3f} "
+                     f"{p['samples']:>8} {column(p['peak_rss_mb']):>8} {column(p['peak_traced_mb']):>8}")
+    lines.append(f"{'total':<14} {'':>7} {report['wall_seconds']:>9.3f}"
+                 + (f"   max RSS {report['max_rss_mb']} MB" if report['max_rss_mb'] is not None else ''))
+    return '\n'.join(lines)
+
+
+def phase(name):
+    """Context manager for one phase of the running profiler; a no-op without one."""
+    if _active is None:
+        return nullcontext()
+    return _active.phase(name)
+
+
+def profiled(name):
+    """Decorator: runs a function, or every resumption of a generator function, inside phase(name)."""
+    def decorator(func):
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                gen = func(*args, **kwargs)
+                value = None
+                while True:
+                    with phase(name):
+                        try:
+                            item = gen.send(value)
+                        except StopIteration:
+                            return
+                    value = yield item
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+PROFILE_HELP = {
+    'en': {
+        'group': 'profiling',
+        'profile': 'Profile phases (stack samples + peak RSS) and write the results to DIR (default: profiles)',
+        'interval': 'Sampling interval in milliseconds (default: 10)',
+        'cprofile': 'Additionally run cProfile per phase (deterministic, higher overhead)',
+        'tracemalloc': 'Additionally track exact Python heap peaks with tracemalloc (slow)',
+    },
+    'de': {
+        'group': 'Profiling',
+        'profile': 'Laufzeit, Stack-Samples und RSS-Spitzen je Phase nach DIR schreiben (default: profiles)',
+        'interval': 'Sampling-Intervall in Millisekunden (default: 10)',
+        'cprofile': 'Zusätzlich cProfile je Phase (deterministisch, deutlich teurer)',
+        'tracemalloc': 'Zusätzlich exakte Python-Heap-Spitzen mit tracemalloc (langsam)',
+    },
+}
+
+
+def add_profile_arguments(parser, language='en'):
+    """Adds the --perf-* options; `language` selects the help texts ('en' or 'de')."""
+    texts = PROFILE_HELP[language]
+    group = parser.add_argument_group(texts['group'])
+    group.add_argument('--perf-profile', nargs='?', const='profiles', default=None, metavar='DIR',
+                       help=texts['profile'])
+    group.add_argument('--perf-interval', type=float, default=10.0, metavar='MS',
+                       help=texts['interval'])
+    group.add_argument('--perf-cprofile', action='store_true', help=texts['cprofile'])
+    group.add_argument('--perf-tracemalloc', action='store_true', help=texts['tracemalloc'])
+    return group
+
+
+def start_profiler(name, output_dir='profiles', interval=0.01, cprofile=False, trace_memory=False,
+                   default_phase='other'):
+    return Profiler(name, output_dir, interval, cprofile, trace_memory, default_phase).start()
+
+
+def profiler_from_args(args, name, default_phase='other'):
+    """Starts a profiler if --perf-profile was given, otherwise returns None."""
+    if args.perf_profile is None:
+        return None
+    return start_profiler(name, args.perf_profile, args.perf_interval / 1000.0, args.perf_cprofile,
+                          args.perf_tracemalloc, default_phase)